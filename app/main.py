@@ -1 +1,11 @@
-from .tools.main import app
+def create_app():
+    """Import and return the FastAPI app; uvicorn calls this in factory mode"""
+    from .tools.main import app
+    return app
+
+
+def __getattr__(name):
+    # Keep `from app.main import app` / "app.main:app" working without eager import
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
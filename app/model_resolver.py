@@ -0,0 +1,15 @@
+"""
+Shared Gemini model-name normalization used by the server banner and LLMClient
+"""
+import functools
+
+DEFAULT_GEMINI_MODEL = "gemini-flash-latest"
+
+
+@functools.lru_cache(maxsize=32)
+def resolve_model(val: str) -> str:
+    """Map 2.0 / bare 1.5-flash model names (rate limited) onto gemini-flash-latest"""
+    val = str(val or DEFAULT_GEMINI_MODEL)
+    if "2.0" in val or val == "1.5-flash":
+        return DEFAULT_GEMINI_MODEL
+    return val
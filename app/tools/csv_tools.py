@@ -43,9 +43,10 @@ def _ensure_csv_exists(path: str) -> None:
 		raise FileNotFoundError(f"CSV not found at {path}")
 
 
-def query_csv(sql: str, limit: int = 1000, csv_path: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+def query_csv(sql: str, limit: int = 1000, csv_path: Optional[str] = None, user_id: Optional[str] = None, params: Optional[List[Any]] = None) -> Dict[str, Any]:
 	"""
 	Run safe SELECT over the transactions CSV. If duckdb unavailable, return head().
+	params are bound to ? placeholders in sql.
 	"""
 	path = csv_path or get_user_csv_path(user_id)
 	if not path:
@@ -68,7 +69,7 @@ def query_csv(sql: str, limit: int = 1000, csv_path: Optional[str] = None, user_
 			q = sql
 			if " limit " not in sql.lower():
 				q = sql.rstrip("; ") + f" LIMIT {limit}"
-			df = con.execute(q).df()
+			df = con.execute(q, params).df() if params else con.execute(q).df()
 			rows = df.to_dict(orient='records')
 			return {
 				"rows": rows,
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
@@ -66,13 +67,23 @@ def _run_duckdb(sql: str, csv_path: str = DATA_PATH) -> pd.DataFrame:
             pass
 
 
+@lru_cache(maxsize=512)
+def _ym_range_literals(year: int, month: Optional[int]) -> Tuple[str, str]:
+    """[start, end) DATE literals for a year, or one month of it"""
+    if month is None:
+        return f"DATE '{year:04d}-01-01'", f"DATE '{year + 1:04d}-01-01'"
+    end_y, end_m = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"DATE '{year:04d}-{month:02d}-01'", f"DATE '{end_y:04d}-{end_m:02d}-01'"
+
+
 def _ym_filter_clause(year: Optional[int], month: Optional[int], date_expr: str = "d") -> str:
-    clauses: List[str] = []
     if year is not None:
-        clauses.append(f"YEAR({date_expr}) = {int(year)}")
+        # Typed range comparison instead of extracting YEAR()/MONTH() from every row
+        start, end = _ym_range_literals(int(year), int(month) if month is not None else None)
+        return f"{date_expr} >= {start} AND {date_expr} < {end}"
     if month is not None:
-        clauses.append(f"MONTH({date_expr}) = {int(month)}")
-    return (" AND ".join(clauses)) or "TRUE"
+        return f"MONTH({date_expr}) = {int(month)}"
+    return "TRUE"
 
 
 def _normalize_date_sql(date_col: str) -> str:
@@ -371,7 +382,13 @@ def _load_data(csv_path: Optional[str] = None, user_id: Optional[str] = None) ->
     
     return df
 
-def extract_year_data(year: int, csv_path: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+def _spend_by(data: pd.DataFrame, key: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Spend per `key`, largest first; with top_k only the k largest are selected (partial sort)"""
+    totals = data.groupby(key)['monthly_expense_total'].sum()
+    totals = totals.nlargest(int(top_k)) if top_k else totals.sort_values(ascending=False)
+    return totals.reset_index().to_dict('records')
+
+def extract_year_data(year: int, csv_path: Optional[str] = None, user_id: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
     """Extract all data for a specific year"""
     try:
         df = _load_data(csv_path, user_id)
@@ -395,9 +412,7 @@ def extract_year_data(year: int, csv_path: Optional[str] = None, user_id: Option
         total_transactions = len(year_data)
         
         # Category breakdown
-        category_breakdown = year_data.groupby('category')['monthly_expense_total'].sum().reset_index()
-        category_breakdown = category_breakdown.sort_values('monthly_expense_total', ascending=False)
-        categories = category_breakdown.to_dict('records')
+        categories = _spend_by(year_data, 'category', top_k)
         
         # Monthly breakdown
         year_data['month'] = year_data['date'].dt.month
@@ -408,9 +423,7 @@ def extract_year_data(year: int, csv_path: Optional[str] = None, user_id: Option
         # Top merchants (if merchant column exists)
         top_merchants = []
         if 'merchant' in year_data.columns:
-            merchant_breakdown = year_data.groupby('merchant')['monthly_expense_total'].sum().reset_index()
-            merchant_breakdown = merchant_breakdown.sort_values('monthly_expense_total', ascending=False).head(10)
-            top_merchants = merchant_breakdown.to_dict('records')
+            top_merchants = _spend_by(year_data, 'merchant', top_k or 10)
         
         return {
             "year": year,
@@ -429,7 +442,7 @@ def extract_year_data(year: int, csv_path: Optional[str] = None, user_id: Option
             "data_available": False
         }
 
-def extract_year_range_data(start_year: int, end_year: int, csv_path: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+def extract_year_range_data(start_year: int, end_year: int, csv_path: Optional[str] = None, user_id: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
     """Extract data for a range of years"""
     try:
         df = _load_data(csv_path, user_id)
@@ -459,9 +472,7 @@ def extract_year_range_data(start_year: int, end_year: int, csv_path: Optional[s
         yearly_data = yearly_breakdown.to_dict('records')
         
         # Category breakdown
-        category_breakdown = range_data.groupby('category')['monthly_expense_total'].sum().reset_index()
-        category_breakdown = category_breakdown.sort_values('monthly_expense_total', ascending=False)
-        categories = category_breakdown.to_dict('records')
+        categories = _spend_by(range_data, 'category', top_k)
         
         return {
             "start_year": start_year,
@@ -481,7 +492,7 @@ def extract_year_range_data(start_year: int, end_year: int, csv_path: Optional[s
             "data_available": False
         }
 
-def extract_month_data(year: int, month: int, csv_path: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+def extract_month_data(year: int, month: int, csv_path: Optional[str] = None, user_id: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
     """Extract data for a specific month"""
     try:
         df = _load_data(csv_path, user_id)
@@ -505,9 +516,7 @@ def extract_month_data(year: int, month: int, csv_path: Optional[str] = None, us
         total_transactions = len(month_data)
         
         # Category breakdown
-        category_breakdown = month_data.groupby('category')['monthly_expense_total'].sum().reset_index()
-        category_breakdown = category_breakdown.sort_values('monthly_expense_total', ascending=False)
-        categories = category_breakdown.to_dict('records')
+        categories = _spend_by(month_data, 'category', top_k)
         
         return {
             "year": year,
@@ -528,7 +537,7 @@ def extract_month_data(year: int, month: int, csv_path: Optional[str] = None, us
             "data_available": False
         }
 
-def extract_date_range_data(start_date: str, end_date: str, csv_path: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+def extract_date_range_data(start_date: str, end_date: str, csv_path: Optional[str] = None, user_id: Optional[str] = None, top_k: Optional[int] = None) -> Dict[str, Any]:
     """Extract data for a specific date range (format: YYYY-MM-DD)"""
     try:
         df = _load_data(csv_path, user_id)
@@ -555,9 +564,7 @@ def extract_date_range_data(start_date: str, end_date: str, csv_path: Optional[s
         total_transactions = len(range_data)
         
         # Category breakdown
-        category_breakdown = range_data.groupby('category')['monthly_expense_total'].sum().reset_index()
-        category_breakdown = category_breakdown.sort_values('monthly_expense_total', ascending=False)
-        categories = category_breakdown.to_dict('records')
+        categories = _spend_by(range_data, 'category', top_k)
         
         return {
             "start_date": start_date,
@@ -22,7 +22,7 @@ if PROJECT_ROOT not in sys.path:
 if os.path.join(PROJECT_ROOT, "vectordb") not in sys.path:
     sys.path.insert(0, os.path.join(PROJECT_ROOT, "vectordb"))
 
-from orchestrator import chat as chat_fn
+from orchestrator import ChatResponse, chat as chat_fn
 try:
     from enhanced_orchestrator import process_historical_query  # optional
 except Exception:
@@ -161,6 +161,8 @@ def chat_api(req: ChatReq):
         if req.user_id and response:
             db.increment_usage(req.user_id, "ai_query")
 
+        if isinstance(response, ChatResponse):
+            return response.to_dict()
         if isinstance(response, dict):
             return response
         return {"answer": str(response), "status": "success", "type": "text"}
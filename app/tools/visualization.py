@@ -5,6 +5,7 @@ import seaborn as sns
 import pandas as pd
 import base64
 import io
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional
 import os
 from datetime import datetime, timedelta
@@ -13,6 +14,21 @@ from datetime import datetime, timedelta
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+@contextmanager
+def _figure(figsize):
+    """plt.subplots() whose figure is always closed, including when drawing fails"""
+    fig, ax = plt.subplots(figsize=figsize)
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+
+def _to_data_uri(fig) -> str:
+    """Render a figure as a base64 PNG data URI"""
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
+    return f"data:image/png;base64,{base64.b64encode(img_buffer.getvalue()).decode()}"
+
 def create_spending_pie_chart(data: Dict[str, Any]) -> str:
     """Create a pie chart for spending by category"""
     try:
@@ -27,31 +43,24 @@ def create_spending_pie_chart(data: Dict[str, Any]) -> str:
             amounts.append(item.get('spent', 0))
         
         # Create pie chart
-        fig, ax = plt.subplots(figsize=(10, 8))
-        wedges, texts, autotexts = ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
-        
-        # Improve text appearance
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        label = ""
-        try:
-            meta = data.get('meta', {}) if isinstance(data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Spending by Category' + label, fontsize=16, fontweight='bold', pad=20)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((10, 8)) as (fig, ax):
+            wedges, texts, autotexts = ax.pie(amounts, labels=categories, autopct='%1.1f%%', startangle=90)
+        
+            # Improve text appearance
+            for autotext in autotexts:
+                autotext.set_color('white')
+                autotext.set_fontweight('bold')
+        
+            label = ""
+            try:
+                meta = data.get('meta', {}) if isinstance(data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Spending by Category' + label, fontsize=16, fontweight='bold', pad=20)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating pie chart: {str(e)}"
 
@@ -75,32 +84,25 @@ def create_spending_trend_chart(csv_data: Dict[str, Any]) -> str:
         monthly_spending = df.groupby('month')['monthly_expense_total'].sum()
         
         # Create line chart
-        fig, ax = plt.subplots(figsize=(12, 6))
-        monthly_spending.plot(kind='line', marker='o', linewidth=2, markersize=6, ax=ax)
-        
-        label = ""
-        try:
-            meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Monthly Spending Trend' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Month', fontsize=12)
-        ax.set_ylabel('Total Spending (INR)', fontsize=12)
-        ax.grid(True, alpha=0.3)
-        
-        # Rotate x-axis labels
-        plt.xticks(rotation=45)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((12, 6)) as (fig, ax):
+            monthly_spending.plot(kind='line', marker='o', linewidth=2, markersize=6, ax=ax)
+        
+            label = ""
+            try:
+                meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Monthly Spending Trend' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Month', fontsize=12)
+            ax.set_ylabel('Total Spending (INR)', fontsize=12)
+            ax.grid(True, alpha=0.3)
+        
+            # Rotate x-axis labels
+            plt.xticks(rotation=45)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating trend chart: {str(e)}"
 
@@ -116,26 +118,21 @@ def create_income_trend_chart(csv_data: Dict[str, Any]) -> str:
         df = df.sort_values('date')
         df['month'] = df['date'].dt.to_period('M')
         monthly_income = df.groupby('month')['monthly_income'].sum()
-        fig, ax = plt.subplots(figsize=(12, 6))
-        monthly_income.plot(kind='line', marker='o', linewidth=2, markersize=6, ax=ax, color='#2E86AB')
-        label = ""
-        try:
-            meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Monthly Salary Trend' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Month', fontsize=12)
-        ax.set_ylabel('Total Salary (INR)', fontsize=12)
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((12, 6)) as (fig, ax):
+            monthly_income.plot(kind='line', marker='o', linewidth=2, markersize=6, ax=ax, color='#2E86AB')
+            label = ""
+            try:
+                meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Monthly Salary Trend' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Month', fontsize=12)
+            ax.set_ylabel('Total Salary (INR)', fontsize=12)
+            ax.grid(True, alpha=0.3)
+            plt.xticks(rotation=45)
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating income trend chart: {str(e)}"
 
@@ -153,37 +150,30 @@ def create_category_bar_chart(data: Dict[str, Any]) -> str:
             amounts.append(item.get('spent', 0))
         
         # Create bar chart
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.bar(categories, amounts, color=sns.color_palette("husl", len(categories)))
-        
-        # Add value labels on bars
-        for bar, amount in zip(bars, amounts):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                   f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
-        
-        label = ""
-        try:
-            meta = data.get('meta', {}) if isinstance(data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Spending by Category' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Category', fontsize=12)
-        ax.set_ylabel('Amount Spent (INR)', fontsize=12)
-        
-        # Rotate x-axis labels
-        plt.xticks(rotation=45, ha='right')
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((12, 8)) as (fig, ax):
+            bars = ax.bar(categories, amounts, color=sns.color_palette("husl", len(categories)))
+        
+            # Add value labels on bars
+            for bar, amount in zip(bars, amounts):
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                       f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
+        
+            label = ""
+            try:
+                meta = data.get('meta', {}) if isinstance(data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Spending by Category' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Category', fontsize=12)
+            ax.set_ylabel('Amount Spent (INR)', fontsize=12)
+        
+            # Rotate x-axis labels
+            plt.xticks(rotation=45, ha='right')
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating bar chart: {str(e)}"
 
@@ -201,40 +191,44 @@ def create_merchant_chart(merchant_data: Dict[str, Any]) -> str:
             amounts.append(item.get('spent', 0))
         
         # Create horizontal bar chart
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.barh(merchants, amounts, color=sns.color_palette("viridis", len(merchants)))
-        
-        # Add value labels
-        for i, (bar, amount) in enumerate(zip(bars, amounts)):
-            width = bar.get_width()
-            ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                   f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
-        
-        label = ""
-        try:
-            meta = merchant_data.get('meta', {}) if isinstance(merchant_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Top Merchants by Spending' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Amount Spent (INR)', fontsize=12)
-        ax.set_ylabel('Merchant', fontsize=12)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((12, 8)) as (fig, ax):
+            bars = ax.barh(merchants, amounts, color=sns.color_palette("viridis", len(merchants)))
+        
+            # Add value labels
+            for i, (bar, amount) in enumerate(zip(bars, amounts)):
+                width = bar.get_width()
+                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
+                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+        
+            label = ""
+            try:
+                meta = merchant_data.get('meta', {}) if isinstance(merchant_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Top Merchants by Spending' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Amount Spent (INR)', fontsize=12)
+            ax.set_ylabel('Merchant', fontsize=12)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating merchant chart: {str(e)}"
 
+def has_chart_data(spending_data: Dict[str, Any], csv_data: Dict[str, Any], merchant_data: Dict[str, Any]) -> bool:
+    """Whether any input carries rows to plot; empty results still come back as e.g. {"totals": []}"""
+    return bool(
+        (spending_data or {}).get('totals')
+        or (csv_data or {}).get('rows')
+        or (merchant_data or {}).get('items')
+    )
+
 def generate_visualizations(spending_data: Dict[str, Any], csv_data: Dict[str, Any], merchant_data: Dict[str, Any]) -> Dict[str, str]:
     """Generate all relevant visualizations based on available data"""
     visualizations = {}
+    if not has_chart_data(spending_data, csv_data, merchant_data):
+        # Nothing to plot (upstream error or no data); skip matplotlib entirely
+        return visualizations
     
     try:
         # Generate pie chart
@@ -285,35 +279,28 @@ def create_monthly_spending_chart(csv_data: Dict[str, Any]) -> str:
         amounts = [monthly_data[month] for month in sorted_months]
         
         # Create chart
-        fig, ax = plt.subplots(figsize=(12, 6))
-        bars = ax.bar(sorted_months, amounts, color='skyblue', edgecolor='navy', alpha=0.7)
-        
-        # Add value labels
-        for bar, amount in zip(bars, amounts):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                   f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
-        
-        label = ""
-        try:
-            meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Monthly Spending Overview' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Month', fontsize=12)
-        ax.set_ylabel('Amount Spent (INR)', fontsize=12)
-        ax.tick_params(axis='x', rotation=45)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((12, 6)) as (fig, ax):
+            bars = ax.bar(sorted_months, amounts, color='skyblue', edgecolor='navy', alpha=0.7)
+        
+            # Add value labels
+            for bar, amount in zip(bars, amounts):
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                       f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
+        
+            label = ""
+            try:
+                meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Monthly Spending Overview' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Month', fontsize=12)
+            ax.set_ylabel('Amount Spent (INR)', fontsize=12)
+            ax.tick_params(axis='x', rotation=45)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating monthly chart: {str(e)}"
 
@@ -339,30 +326,23 @@ def create_daily_spending_chart(csv_data: Dict[str, Any]) -> str:
         amounts = [daily_data[date] for date in sorted_dates]
         
         # Create chart
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(sorted_dates, amounts, marker='o', linewidth=2, markersize=4, color='green')
-        ax.fill_between(sorted_dates, amounts, alpha=0.3, color='green')
-        
-        label = ""
-        try:
-            meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Daily Spending Trend (Last 30 Days)' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Date', fontsize=12)
-        ax.set_ylabel('Amount Spent (INR)', fontsize=12)
-        ax.tick_params(axis='x', rotation=45)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((14, 6)) as (fig, ax):
+            ax.plot(sorted_dates, amounts, marker='o', linewidth=2, markersize=4, color='green')
+            ax.fill_between(sorted_dates, amounts, alpha=0.3, color='green')
+        
+            label = ""
+            try:
+                meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Daily Spending Trend (Last 30 Days)' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Date', fontsize=12)
+            ax.set_ylabel('Amount Spent (INR)', fontsize=12)
+            ax.tick_params(axis='x', rotation=45)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating daily chart: {str(e)}"
 
@@ -383,37 +363,30 @@ def create_amount_distribution_chart(csv_data: Dict[str, Any]) -> str:
             return ""
         
         # Create histogram
-        fig, ax = plt.subplots(figsize=(10, 6))
-        n, bins, patches = ax.hist(amounts, bins=20, color='lightcoral', edgecolor='black', alpha=0.7)
-        
-        # Color bars by height
-        for i, (bar, count) in enumerate(zip(patches, n)):
-            bar.set_facecolor(plt.cm.viridis(count / max(n)))
-        
-        label = ""
-        try:
-            meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
-            if isinstance(meta, dict) and meta.get('label'):
-                label = f" ({meta['label']})"
-        except Exception:
-            pass
-        ax.set_title('Transaction Amount Distribution' + label, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Amount (INR)', fontsize=12)
-        ax.set_ylabel('Frequency', fontsize=12)
-        
-        # Add statistics
-        mean_amount = sum(amounts) / len(amounts)
-        ax.axvline(mean_amount, color='red', linestyle='--', linewidth=2, label=f'Mean: ₹{mean_amount:,.0f}')
-        ax.legend()
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((10, 6)) as (fig, ax):
+            n, bins, patches = ax.hist(amounts, bins=20, color='lightcoral', edgecolor='black', alpha=0.7)
+        
+            # Color bars by height
+            for i, (bar, count) in enumerate(zip(patches, n)):
+                bar.set_facecolor(plt.cm.viridis(count / max(n)))
+        
+            label = ""
+            try:
+                meta = csv_data.get('meta', {}) if isinstance(csv_data, dict) else {}
+                if isinstance(meta, dict) and meta.get('label'):
+                    label = f" ({meta['label']})"
+            except Exception:
+                pass
+            ax.set_title('Transaction Amount Distribution' + label, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Amount (INR)', fontsize=12)
+            ax.set_ylabel('Frequency', fontsize=12)
+        
+            # Add statistics
+            mean_amount = sum(amounts) / len(amounts)
+            ax.axvline(mean_amount, color='red', linestyle='--', linewidth=2, label=f'Mean: ₹{mean_amount:,.0f}')
+            ax.legend()
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating amount distribution chart: {str(e)}"
 
@@ -434,29 +407,22 @@ def create_category_comparison_chart(spending_data: Dict[str, Any]) -> str:
             return ""
         
         # Create horizontal bar chart for better comparison
-        fig, ax = plt.subplots(figsize=(10, 8))
-        y_pos = range(len(categories))
-        bars = ax.barh(y_pos, amounts, color='lightblue', edgecolor='navy')
-        
-        # Add value labels
-        for i, (bar, amount) in enumerate(zip(bars, amounts)):
-            width = bar.get_width()
-            ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                   f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
-        
-        ax.set_yticks(y_pos)
-        ax.set_yticklabels(categories)
-        ax.set_xlabel('Amount Spent (INR)', fontsize=12)
-        ax.set_title('Category Spending Comparison', fontsize=16, fontweight='bold', pad=20)
-        
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+        with _figure((10, 8)) as (fig, ax):
+            y_pos = range(len(categories))
+            bars = ax.barh(y_pos, amounts, color='lightblue', edgecolor='navy')
+        
+            # Add value labels
+            for i, (bar, amount) in enumerate(zip(bars, amounts)):
+                width = bar.get_width()
+                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
+                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+        
+            ax.set_yticks(y_pos)
+            ax.set_yticklabels(categories)
+            ax.set_xlabel('Amount Spent (INR)', fontsize=12)
+            ax.set_title('Category Spending Comparison', fontsize=16, fontweight='bold', pad=20)
+        
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating comparison chart: {str(e)}"
 
@@ -536,28 +502,21 @@ def create_historical_yearly_trend_chart(yearly_data: List[Dict[str, Any]], titl
         years = [str(item['year']) for item in yearly_data]
         amounts = [item['monthly_expense_total'] for item in yearly_data]
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(years, amounts, marker='o', linewidth=2, markersize=6, color='#2E86AB')
-        ax.fill_between(years, amounts, alpha=0.3, color='#2E86AB')
+        with _figure((12, 6)) as (fig, ax):
+            ax.plot(years, amounts, marker='o', linewidth=2, markersize=6, color='#2E86AB')
+            ax.fill_between(years, amounts, alpha=0.3, color='#2E86AB')
         
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Year', fontsize=12)
-        ax.set_ylabel('Total Spending (INR)', fontsize=12)
-        ax.grid(True, alpha=0.3)
+            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Year', fontsize=12)
+            ax.set_ylabel('Total Spending (INR)', fontsize=12)
+            ax.grid(True, alpha=0.3)
         
-        # Add value labels on points
-        for i, (year, amount) in enumerate(zip(years, amounts)):
-            ax.annotate(f'₹{amount:,.0f}', (year, amount), 
-                       textcoords="offset points", xytext=(0,10), ha='center')
+            # Add value labels on points
+            for i, (year, amount) in enumerate(zip(years, amounts)):
+                ax.annotate(f'₹{amount:,.0f}', (year, amount), 
+                           textcoords="offset points", xytext=(0,10), ha='center')
         
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating yearly trend chart: {str(e)}"
 
@@ -570,28 +529,21 @@ def create_historical_monthly_breakdown_chart(monthly_data: List[Dict[str, Any]]
         months = [item['month_name'] for item in monthly_data]
         amounts = [item['monthly_expense_total'] for item in monthly_data]
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        bars = ax.bar(months, amounts, color='#A23B72', alpha=0.8)
-        
-        # Add value labels on bars
-        for bar, amount in zip(bars, amounts):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                   f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
+        with _figure((12, 6)) as (fig, ax):
+            bars = ax.bar(months, amounts, color='#A23B72', alpha=0.8)
         
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Month', fontsize=12)
-        ax.set_ylabel('Amount Spent (INR)', fontsize=12)
-        ax.tick_params(axis='x', rotation=45)
+            # Add value labels on bars
+            for bar, amount in zip(bars, amounts):
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
+                       f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
         
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
+            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Month', fontsize=12)
+            ax.set_ylabel('Amount Spent (INR)', fontsize=12)
+            ax.tick_params(axis='x', rotation=45)
         
-        return f"data:image/png;base64,{img_base64}"
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating monthly breakdown chart: {str(e)}"
 
@@ -606,27 +558,20 @@ def create_historical_category_breakdown_chart(categories: List[Dict[str, Any]],
         cat_names = [item['category'] for item in top_categories]
         amounts = [item['monthly_expense_total'] for item in top_categories]
         
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.barh(cat_names, amounts, color='#F18F01', alpha=0.8)
+        with _figure((12, 8)) as (fig, ax):
+            bars = ax.barh(cat_names, amounts, color='#F18F01', alpha=0.8)
         
-        # Add value labels
-        for i, (bar, amount) in enumerate(zip(bars, amounts)):
-            width = bar.get_width()
-            ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                   f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+            # Add value labels
+            for i, (bar, amount) in enumerate(zip(bars, amounts)):
+                width = bar.get_width()
+                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
+                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
         
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Amount Spent (INR)', fontsize=12)
-        ax.set_ylabel('Category', fontsize=12)
+            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Amount Spent (INR)', fontsize=12)
+            ax.set_ylabel('Category', fontsize=12)
         
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
-        
-        return f"data:image/png;base64,{img_base64}"
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating category breakdown chart: {str(e)}"
 
@@ -641,27 +586,20 @@ def create_historical_top_merchants_chart(merchants: List[Dict[str, Any]], title
         merchant_names = [item['merchant'] for item in top_merchants]
         amounts = [item['monthly_expense_total'] for item in top_merchants]
         
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.barh(merchant_names, amounts, color='#C73E1D', alpha=0.8)
-        
-        # Add value labels
-        for i, (bar, amount) in enumerate(zip(bars, amounts)):
-            width = bar.get_width()
-            ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                   f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+        with _figure((12, 8)) as (fig, ax):
+            bars = ax.barh(merchant_names, amounts, color='#C73E1D', alpha=0.8)
         
-        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Amount Spent (INR)', fontsize=12)
-        ax.set_ylabel('Merchant', fontsize=12)
+            # Add value labels
+            for i, (bar, amount) in enumerate(zip(bars, amounts)):
+                width = bar.get_width()
+                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
+                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
         
-        # Convert to base64
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-        plt.close()
+            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+            ax.set_xlabel('Amount Spent (INR)', fontsize=12)
+            ax.set_ylabel('Merchant', fontsize=12)
         
-        return f"data:image/png;base64,{img_base64}"
+            return _to_data_uri(fig)
     except Exception as e:
         return f"Error creating top merchants chart: {str(e)}"
 
@@ -1,4 +1,5 @@
 import os
+import functools
 import pymongo
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
@@ -19,8 +20,13 @@ class MongoDBService:
         
         if self.uri:
             try:
-                # Reduced timeout to 2000ms for faster fallback
-                self.client = pymongo.MongoClient(self.uri, serverSelectionTimeoutMS=2000)
+                # Reduced timeout to 2000ms for faster fallback; bounded pool shared by every caller
+                self.client = pymongo.MongoClient(
+                    self.uri,
+                    serverSelectionTimeoutMS=2000,
+                    maxPoolSize=20,
+                    minPoolSize=2
+                )
                 self.db = self.client[self.database_name]
                 # Trigger a connection attempt
                 self.client.server_info()
@@ -118,6 +124,40 @@ class MongoDBService:
         if self.db is None: return []
         return self.db.user_profiles.distinct("user_id")
 
+    def bulk_profile_ops(self, ops: List[Any]) -> Dict[str, Any]:
+        """Apply several user_profiles writes (InsertOne/UpdateOne/...) in one round trip"""
+        if self.db is None: return {"success": False, "error": "Database not connected"}
+        if not ops: return {"success": True, "modified_count": 0, "upserted_count": 0}
+        try:
+            result = self.db.user_profiles.bulk_write(ops, ordered=True)
+            self.save_local_data()
+            return {
+                "success": True,
+                "modified_count": result.modified_count,
+                "upserted_count": result.upserted_count
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def profile_and_users(self, user_id: str) -> Dict[str, Any]:
+        """Fetch one user's profile and the list of all user ids in a single aggregation"""
+        if self.db is None: return {"profile": None, "users": []}
+        try:
+            result = list(self.db.user_profiles.aggregate([
+                {"$facet": {
+                    "target": [{"$match": {"user_id": user_id}}, {"$limit": 1}, {"$project": {"_id": 0}}],
+                    "all": [{"$group": {"_id": "$user_id"}}]
+                }}
+            ]))
+            facets = result[0] if result else {}
+            target = facets.get("target") or []
+            return {
+                "profile": target[0] if target else None,
+                "users": [doc["_id"] for doc in facets.get("all", []) if doc.get("_id") is not None]
+            }
+        except Exception as e:
+            return {"profile": None, "users": [], "error": str(e)}
+
     def save_user_csv_metadata(self, user_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         if self.db is None: return {"success": False, "error": "Database not connected"}
         try:
@@ -382,10 +422,7 @@ class MongoDBService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-_service = None
-
-def get_mongodb_service():
-    global _service
-    if _service is None:
-        _service = MongoDBService()
-    return _service
+@functools.lru_cache(maxsize=1)
+def get_mongodb_service() -> MongoDBService:
+    """Process-wide MongoDBService, so every caller shares one MongoClient connection pool"""
+    return MongoDBService()
@@ -1,8 +1,14 @@
 # llm/llm_client.py
+import asyncio
+import json
 import os
 import requests
-from typing import Optional, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, Iterator, List
 import time
+from app.model_resolver import resolve_model
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 class LLMClient:
     def __init__(
@@ -10,7 +16,8 @@ class LLMClient:
         base_url: str = None,
         timeout: int = 60,
         retries: int = 2,
-        backoff_seconds: float = 1.5
+        backoff_seconds: float = 1.5,
+        session: Optional[requests.Session] = None
     ):
         """
         Lightweight client for multiple LLM providers (FreeLLM-compatible and Gemini).
@@ -21,7 +28,9 @@ class LLMClient:
           - LLM_PAYLOAD_STYLE: 'message' | 'messages' (default: 'message', only for 'free')
           - GEMINI_API_KEY: required when LLM_PROVIDER=gemini
           - GEMINI_MODEL: model name (default: 'gemini-1.5-flash')
+        All providers share one keep-alive session, so repeat calls skip the TCP/TLS handshake.
         """
+        self.session = session or self._new_session()
         self.provider = (os.getenv("LLM_PROVIDER", "free") or "free").lower()
         self.base_url = base_url or os.getenv("LLM_BASE_URL", "https://apifreellm.com/api/chat")
         self.timeout = timeout
@@ -32,15 +41,74 @@ class LLMClient:
         # Gemini config
         self.gemini_api_key = os.getenv("GEMINI_API_KEY")
         # FORCE gemini-flash-latest as default (standard name) and override any accidental 2.0 settings which are causing rate limits
-        model_env = os.getenv("GEMINI_MODEL", "gemini-flash-latest")
-        if "2.0" in str(model_env) or "1.5-flash" == model_env:
-            model_env = "gemini-flash-latest"
-        self.gemini_model = model_env
+        self.gemini_model = resolve_model(os.getenv("GEMINI_MODEL", "gemini-flash-latest"))
         print(f"DEBUG: LLMClient initialized with model: {self.gemini_model}")
         # OpenRouter config
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.openrouter_model = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-exp:free")
 
+    @staticmethod
+    def _new_session() -> requests.Session:
+        session = requests.Session()
+        # Room for the concurrent calls made from worker threads / complete_async
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    async def complete_async(self, prompt: str, system: Optional[str] = None) -> str:
+        """complete() on a worker thread, so several prompts can be awaited together"""
+        return await asyncio.to_thread(self.complete, prompt, system)
+
+    def stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield the completion in pieces as the provider sends them (SSE for Gemini and OpenRouter).
+        The 'free' provider has no streaming API, so its whole answer is yielded once.
+        """
+        if self.provider == "gemini":
+            if not self.gemini_api_key:
+                raise RuntimeError("GEMINI_API_KEY not set. Please export GEMINI_API_KEY or set LLM_PROVIDER=free.")
+            url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:streamGenerateContent?alt=sse&key={self.gemini_api_key}"
+            for js in self._sse(url, {"Content-Type": "application/json"}, self._gemini_body(prompt, system), "Gemini"):
+                for cand in (js.get("candidates") or [])[:1]:
+                    for part in (cand.get("content") or {}).get("parts") or []:
+                        if isinstance(part.get("text"), str) and part["text"]:
+                            yield part["text"]
+        elif self.provider == "openrouter":
+            if not self.openrouter_api_key:
+                raise RuntimeError("OPENROUTER_API_KEY not set. Please export OPENROUTER_API_KEY.")
+            body = {**self._openrouter_body(prompt, system), "stream": True}
+            for js in self._sse(OPENROUTER_URL, self._openrouter_headers(), body, "OpenRouter"):
+                for choice in (js.get("choices") or [])[:1]:
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        else:
+            yield self.complete(prompt, system)
+
+    def _sse(self, url: str, headers: Dict[str, str], body: Dict[str, Any], label: str) -> Iterator[Dict[str, Any]]:
+        """POST with a streamed response and yield each server-sent `data:` event as JSON"""
+        try:
+            resp = self.session.post(url, headers=headers, json=body, timeout=self.timeout, stream=True)
+        except requests.RequestException as e:
+            raise RuntimeError(f"{label} request failed: {e}") from e
+        with resp:
+            if not (200 <= resp.status_code < 300):
+                snippet = (resp.text or "")[:500]
+                raise RuntimeError(f"{label} HTTP {resp.status_code}: {snippet}")
+            resp.encoding = "utf-8"  # SSE is always UTF-8; requests would guess latin-1 for text/*
+            for line in resp.iter_lines(decode_unicode=True):
+                # Blank lines separate events; ':' lines are keep-alive comments
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    yield json.loads(data)
+                except ValueError:
+                    continue
+
     def complete(self, prompt: str, system: Optional[str] = None) -> str:
         """
         Send a chat completion request.
@@ -72,7 +140,7 @@ class LLMClient:
         last_err = None
         for attempt in range(self.retries + 1):
             try:
-                resp = requests.post(self.base_url, headers=self.headers, json=data, timeout=self.timeout)
+                resp = self.session.post(self.base_url, headers=self.headers, json=data, timeout=self.timeout)
                 break
             except requests.RequestException as e:
                 last_err = e
@@ -126,17 +194,8 @@ class LLMClient:
         # Surface error details for easier debugging
         raise RuntimeError(f"LLM error: status={js.get('status')} error={js.get('error') or js}")
 
-    def _complete_gemini(self, prompt: str, system: Optional[str]) -> str:
-        """
-        Google Gemini (Generative Language API) text generation via REST.
-        """
-        if not self.gemini_api_key:
-            raise RuntimeError("GEMINI_API_KEY not set. Please export GEMINI_API_KEY or set LLM_PROVIDER=free.")
-
-        # Endpoint
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent?key={self.gemini_api_key}"
-
-        # Build body
+    @staticmethod
+    def _gemini_body(prompt: str, system: Optional[str]) -> Dict[str, Any]:
         system_text = (system or "").strip()
         body: Dict[str, Any] = {
             "contents": [
@@ -151,11 +210,23 @@ class LLMClient:
             body["systemInstruction"] = {
                 "parts": [{"text": system_text}]
             }
+        return body
+
+    def _complete_gemini(self, prompt: str, system: Optional[str]) -> str:
+        """
+        Google Gemini (Generative Language API) text generation via REST.
+        """
+        if not self.gemini_api_key:
+            raise RuntimeError("GEMINI_API_KEY not set. Please export GEMINI_API_KEY or set LLM_PROVIDER=free.")
+
+        # Endpoint
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent?key={self.gemini_api_key}"
+        body = self._gemini_body(prompt, system)
 
         last_err = None
         for attempt in range(self.retries + 1):
             try:
-                resp = requests.post(url, headers={"Content-Type": "application/json"}, json=body, timeout=self.timeout)
+                resp = self.session.post(url, headers={"Content-Type": "application/json"}, json=body, timeout=self.timeout)
                 break
             except requests.RequestException as e:
                 last_err = e
@@ -188,35 +259,39 @@ class LLMClient:
             return js["text"]
         raise RuntimeError(f"Gemini error: {js}")
 
-    def _complete_openrouter(self, prompt: str, system: Optional[str]) -> str:
-        """
-        OpenRouter (OpenAI-compatible) text generation.
-        """
-        if not self.openrouter_api_key:
-            raise RuntimeError("OPENROUTER_API_KEY not set. Please export OPENROUTER_API_KEY.")
-
-        url = "https://openrouter.ai/api/v1/chat/completions"
-        headers = {
+    def _openrouter_headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.openrouter_api_key}",
             "HTTP-Referer": "https://copenny.ai", # Optional
             "X-Title": "Co Penny", # Optional
             "Content-Type": "application/json"
         }
 
+    def _openrouter_body(self, prompt: str, system: Optional[str]) -> Dict[str, Any]:
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
-
-        body = {
+        return {
             "model": self.openrouter_model,
             "messages": messages
         }
 
+    def _complete_openrouter(self, prompt: str, system: Optional[str]) -> str:
+        """
+        OpenRouter (OpenAI-compatible) text generation.
+        """
+        if not self.openrouter_api_key:
+            raise RuntimeError("OPENROUTER_API_KEY not set. Please export OPENROUTER_API_KEY.")
+
+        url = OPENROUTER_URL
+        headers = self._openrouter_headers()
+        body = self._openrouter_body(prompt, system)
+
         last_err = None
         for attempt in range(self.retries + 1):
             try:
-                resp = requests.post(url, headers=headers, json=body, timeout=self.timeout)
+                resp = self.session.post(url, headers=headers, json=body, timeout=self.timeout)
                 break
             except requests.RequestException as e:
                 last_err = e
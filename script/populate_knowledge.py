@@ -4,22 +4,23 @@ Run this to seed the knowledge base with initial content
 """
 import os
 import sys
+import asyncio
+from typing import Any, Dict, List
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from vectordb.knowledge_store import get_knowledge_store
 
+# Max in-flight store_* calls while seeding
+STORE_CONCURRENCY = 8
 
-def populate_sample_knowledge():
-    """Populate VectorDB with sample financial knowledge"""
-    knowledge_store = get_knowledge_store()
-    
-    print("📚 Populating VectorDB with financial knowledge...\n")
-    
+
+# Seed documents; each entry maps onto the matching knowledge_store.store_* call
+SEED_ITEMS = [
     # Sample Market Insights
-    print("Adding market insights...")
-    knowledge_store.store_market_insight(
+    dict(
+        store="store_market_insight",
         title="Indian Equity Market Overview 2024",
         content="""
         The Indian equity market has shown resilience in 2024, with the Nifty 50 and Sensex 
@@ -43,11 +44,11 @@ def populate_sample_knowledge():
         """,
         date="2024-01-15",
         source="Market Research"
-    )
-    
+    ),
+
     # Investment Strategies
-    print("Adding investment strategies...")
-    knowledge_store.store_strategy(
+    dict(
+        store="store_strategy",
         title="Systematic Investment Plan (SIP) Strategy",
         content="""
         SIP is one of the most effective ways to build wealth over the long term.
@@ -71,9 +72,10 @@ def populate_sample_knowledge():
         """,
         strategy_type="SIP",
         risk_level="moderate"
-    )
-    
-    knowledge_store.store_strategy(
+    ),
+
+    dict(
+        store="store_strategy",
         title="Asset Allocation by Age",
         content="""
         Asset allocation should change based on your age and life stage.
@@ -104,11 +106,11 @@ def populate_sample_knowledge():
         """,
         strategy_type="Asset Allocation",
         risk_level="moderate"
-    )
-    
+    ),
+
     # Risk Profile Guidance
-    print("Adding risk profile guidance...")
-    knowledge_store.store_risk_guidance(
+    dict(
+        store="store_risk_guidance",
         title="Conservative Risk Profile Investment Guide",
         risk_profile="conservative",
         content="""
@@ -131,14 +133,11 @@ def populate_sample_knowledge():
         - Small-cap and mid-cap funds
         - Derivatives and futures trading
         - Cryptocurrency and speculative investments
-        
-        Expected Returns: 6-8% annually
-        Risk Level: Low
-        Time Horizon: Short to medium term (1-5 years)
         """
-    )
-    
-    knowledge_store.store_risk_guidance(
+    ),
+
+    dict(
+        store="store_risk_guidance",
         title="Moderate Risk Profile Investment Guide",
         risk_profile="moderate",
         content="""
@@ -156,20 +155,11 @@ def populate_sample_knowledge():
         - Debt Mutual Funds
         - ELSS for tax savings
         - Gold ETFs for diversification
-        
-        Portfolio Structure:
-        - 40% Large-cap funds
-        - 30% Mid-cap funds
-        - 20% Debt funds
-        - 10% Small-cap funds
-        
-        Expected Returns: 10-12% annually
-        Risk Level: Medium
-        Time Horizon: Medium to long term (5-10 years)
         """
-    )
-    
-    knowledge_store.store_risk_guidance(
+    ),
+
+    dict(
+        store="store_risk_guidance",
         title="Aggressive Risk Profile Investment Guide",
         risk_profile="aggressive",
         content="""
@@ -187,27 +177,36 @@ def populate_sample_knowledge():
         - Direct equity investments in growth stocks
         - International equity funds for diversification
         
-        Portfolio Structure:
-        - 30% Large-cap funds
-        - 40% Mid-cap funds
-        - 20% Small-cap funds
-        - 10% Debt funds
-        
         Risk Management:
         - Diversify across sectors
         - Regular portfolio review
         - Set stop-losses for direct equity
         - Maintain emergency fund
-        
-        Expected Returns: 12-15%+ annually
-        Risk Level: High
-        Time Horizon: Long term (10+ years)
         """
-    )
-    
+    ),
+
+    # Shared comparison so the per-profile guides don't embed the same template three times
+    dict(
+        store="store_document",
+        title="Risk Profile Comparison Table",
+        content="""
+        Risk profiles compared (conservative / moderate / aggressive):
+        
+        Risk Level: Low / Medium / High
+        Expected Returns: 6-8% / 10-12% / 12-15%+ annually
+        Time Horizon: 1-5 years / 5-10 years / 10+ years
+        
+        Portfolio Structure:
+        - Moderate: 40% Large-cap, 30% Mid-cap, 20% Debt, 10% Small-cap funds
+        - Aggressive: 30% Large-cap, 40% Mid-cap, 20% Small-cap, 10% Debt funds
+        """,
+        namespace="general",
+        metadata={"type": "education", "category": "risk_profiles"}
+    ),
+
     # General Financial Education
-    print("Adding general financial knowledge...")
-    knowledge_store.store_document(
+    dict(
+        store="store_document",
         title="Mutual Fund Basics",
         content="""
         Mutual funds pool money from multiple investors to invest in a diversified portfolio.
@@ -242,9 +241,10 @@ def populate_sample_knowledge():
         """,
         namespace="general",
         metadata={"type": "education", "category": "mutual_funds"}
-    )
-    
-    knowledge_store.store_document(
+    ),
+
+    dict(
+        store="store_document",
         title="Emergency Fund Planning",
         content="""
         An emergency fund is crucial for financial security.
@@ -284,7 +284,31 @@ def populate_sample_knowledge():
         """,
         namespace="general",
         metadata={"type": "education", "category": "emergency_fund"}
-    )
+    ),
+]
+
+
+async def _store_item(knowledge_store, item: Dict[str, Any], sem: asyncio.Semaphore):
+    """Run one seed item's blocking store_* call on a worker thread"""
+    params = {k: v for k, v in item.items() if k != "store"}
+    async with sem:
+        return await asyncio.to_thread(getattr(knowledge_store, item["store"]), **params)
+
+
+async def store_documents_bulk(knowledge_store, items: List[Dict[str, Any]]) -> None:
+    """Hand all items to the store's store_* calls, STORE_CONCURRENCY at a time"""
+    sem = asyncio.Semaphore(STORE_CONCURRENCY)
+    await asyncio.gather(*(_store_item(knowledge_store, item, sem) for item in items))
+
+
+async def populate_sample_knowledge():
+    """Populate VectorDB with sample financial knowledge"""
+    knowledge_store = get_knowledge_store()
+    
+    print("📚 Populating VectorDB with financial knowledge...\n")
+    
+    print(f"Adding {len(SEED_ITEMS)} seed documents...")
+    await store_documents_bulk(knowledge_store, SEED_ITEMS)
     
     print("\n✅ Knowledge base populated successfully!")
     print("\nYou can now query the VectorDB for financial advice.")
@@ -295,5 +319,5 @@ def populate_sample_knowledge():
 
 
 if __name__ == "__main__":
-    populate_sample_knowledge()
+    asyncio.run(populate_sample_knowledge())
 
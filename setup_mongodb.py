@@ -1,41 +1,81 @@
 """
 Quick setup script for MongoDB Atlas connection
 Run this script to configure MongoDB connection using your Atlas credentials
+
+Non-interactive use (CI/containers):
+  python setup_mongodb.py --username USER --password PASS --cluster cluster0 --database cashflow
+Unset flags fall back to MONGODB_USERNAME/PASSWORD/CLUSTER/DATABASE, then the defaults;
+prompts are only shown when stdin is a terminal and --no-input is not given.
 """
 import os
 import sys
+import argparse
+import threading
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# MongoDBService reads MONGODB_URI when the service is first constructed, not at import
+from database.mongodb_service import get_mongodb_service
+
+# (flag, env var, default, prompt label)
+CREDENTIAL_FIELDS = [
+    ("username", "MONGODB_USERNAME", "adnanshaikhyder_db_user", "Username"),
+    ("password", "MONGODB_PASSWORD", "DrNezBg3XE7nb5bt", "Password"),
+    ("cluster", "MONGODB_CLUSTER", "cluster0", "Cluster name"),
+    ("database", "MONGODB_DATABASE", "cashflow", "Database name"),
+]
+
 
-# Add the project to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'apex-wealth-agents'))
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Configure the MongoDB Atlas connection")
+    for flag, env_key, default, label in CREDENTIAL_FIELDS:
+        parser.add_argument(f"--{flag}", default=None, help=f"{label} (env: {env_key}, default: {default})")
+    parser.add_argument("--no-input", action="store_true", help="Never prompt; use flags, env vars or defaults")
+    return parser.parse_args(argv)
 
-def setup_mongodb():
+
+def _resolve_credentials(args) -> dict:
+    """Flags win, then env vars, then defaults; prompt only for missing flags on a TTY"""
+    interactive = not args.no_input and sys.stdin.isatty()
+    values = {}
+    for flag, env_key, default, label in CREDENTIAL_FIELDS:
+        value = getattr(args, flag)
+        if not value:
+            fallback = os.environ.get(env_key) or default
+            value = (input(f"{label} [{fallback}]: ").strip() if interactive else "") or fallback
+        values[flag] = value
+    return values
+
+
+def _test_connection(result: dict):
+    """Connect in the background; the caller prints the outcome after joining"""
+    try:
+        result["connected"] = get_mongodb_service().is_connected()
+    except Exception as e:
+        result["error"] = e
+
+
+def setup_mongodb(argv=None):
     """Setup MongoDB connection with user credentials"""
+    args = _parse_args(argv)
     
     print("=" * 60)
     print("MongoDB Atlas Connection Setup")
     print("=" * 60)
     print()
     
-    # Get credentials from user
-    print("Enter your MongoDB Atlas credentials:")
-    print("(You can find these in the MongoDB Atlas connection modal)")
-    print()
-    
-    username = input("Username [adnanshaikhyder_db_user]: ").strip()
-    if not username:
-        username = "adnanshaikhyder_db_userr"
-    
-    password = input("Password [DrNezBg3XE7nb5bt]: ").strip()
-    if not password:
-        password = "DrNezBg3XE7nb5bt"
+    # Get credentials from flags/env, prompting only when run interactively
+    if sys.stdin.isatty() and not args.no_input:
+        print("Enter your MongoDB Atlas credentials:")
+        print("(You can find these in the MongoDB Atlas connection modal)")
+        print()
     
-    cluster = input("Cluster name [cluster0]: ").strip()
-    if not cluster:
-        cluster = "cluster0"
-    
-    database = input("Database name [cashflow]: ").strip()
-    if not database:
-        database = "cashflow"
+    creds = _resolve_credentials(args)
+    username = creds["username"]
+    password = creds["password"]
+    cluster = creds["cluster"]
+    database = creds["database"]
     
     print()
     print("Setting up MongoDB connection...")
@@ -50,6 +90,11 @@ def setup_mongodb():
     os.environ["MONGODB_CLUSTER"] = cluster
     os.environ["MONGODB_DATABASE"] = database
     
+    # Start the connection test now so it overlaps with printing the export commands
+    test_result = {}
+    tester = threading.Thread(target=_test_connection, args=(test_result,), daemon=True)
+    tester.start()
+    
     print()
     print("✅ Environment variables set!")
     print()
@@ -67,25 +112,18 @@ def setup_mongodb():
     
     # Test connection
     print("Testing MongoDB connection...")
-    try:
-        import sys
-        import os
-        # Add apex-wealth-agents to path
-        sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'apex-wealth-agents'))
-        from database.mongodb_service import get_mongodb_service
-        
-        mongodb = get_mongodb_service()
-        if mongodb.is_connected():
-            print("✅ Successfully connected to MongoDB Atlas!")
-            print(f"   Database: {database}")
-            print(f"   Cluster: {cluster}")
-        else:
-            print("⚠️  Could not connect to MongoDB")
-            print("   Please check your credentials and network access")
-    except Exception as e:
-        print(f"⚠️  Connection test failed: {e}")
+    tester.join()
+    if "error" in test_result:
+        print(f"⚠️  Connection test failed: {test_result['error']}")
         print("   The credentials are set, but connection test failed.")
         print("   Make sure your IP is whitelisted in MongoDB Atlas Network Access")
+    elif test_result.get("connected"):
+        print("✅ Successfully connected to MongoDB Atlas!")
+        print(f"   Database: {database}")
+        print(f"   Cluster: {cluster}")
+    else:
+        print("⚠️  Could not connect to MongoDB")
+        print("   Please check your credentials and network access")
     
     print()
     print("=" * 60)
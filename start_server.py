@@ -2,7 +2,6 @@
 """
 Start the Cashflow server on port 8000
 """
-import uvicorn
 import os
 import sys
 
@@ -15,18 +14,16 @@ if project_root not in sys.path:
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
+from app.model_resolver import resolve_model
+
 if __name__ == "__main__":
     print("Starting Cashflow server...", flush=True)
     sys.stdout.flush()
     
     # Environment Diagnostics
     provider = os.getenv("LLM_PROVIDER", "free")
-    model_env = os.getenv("GEMINI_MODEL", "gemini-flash-latest")
+    model_env = resolve_model(os.getenv("GEMINI_MODEL", "gemini-flash-latest"))
     
-    # Mirror the logic in llm_client.py for visibility
-    if "2.0" in str(model_env) or "1.5-flash" == model_env:
-        model_env = "gemini-flash-latest"
-        
     print(f"LLM Configuration: Provider={provider}, Effective Model={model_env}")
     
     print("Landing page: http://localhost:8080/landing")
@@ -38,10 +35,22 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     print(f"Starting server on port {port}...")
     
-    uvicorn.run(
-        "app.main:app", 
-        host="0.0.0.0", 
-        port=port, 
-        log_level="info",
-        reload=False  # Reload false for production
-    )
+    run_kwargs = {
+        "host": "0.0.0.0",
+        "port": port,
+        "log_level": "info",
+        "reload": False,  # Reload false for production
+        "workers": 1,
+    }
+    if os.environ.get("ENV") == "prod":
+        # uvloop/httptools + one worker per core; dev keeps the single default-loop worker
+        run_kwargs.update(
+            loop="uvloop" if sys.platform != "win32" else "auto",
+            http="httptools",
+            workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        )
+        print(f"Production mode: {run_kwargs['workers']} worker(s), loop={run_kwargs['loop']}")
+    
+    # Imported late so the config above prints even if server deps are missing
+    import uvicorn
+    uvicorn.run("app.main:create_app", factory=True, **run_kwargs)
@@ -19,6 +19,7 @@ def test_mongodb_connection():
     print()
     
     try:
+        from pymongo import UpdateOne
         from database.mongodb_service import get_mongodb_service
         
         # Get MongoDB service
@@ -55,37 +56,34 @@ def test_mongodb_connection():
             "advice_tone": "warm, practical"
         }
         
-        print("   Creating test profile...")
-        result = mongodb.create_user_profile(test_user_id, test_profile)
+        updates = {"risk_preference": "aggressive"}
+        
+        # Create + update in a single ordered bulk write
+        print("   Creating and updating test profile...")
+        result = mongodb.bulk_profile_ops([
+            UpdateOne({"user_id": test_user_id}, {"$set": {**test_profile, "user_id": test_user_id}}, upsert=True),
+            UpdateOne({"user_id": test_user_id}, {"$set": updates})
+        ])
         if result.get("success"):
-            print("   ✅ Profile created successfully")
+            print("   ✅ Profile created and updated successfully")
         else:
-            print(f"   ❌ Failed to create profile: {result.get('error')}")
+            print(f"   ❌ Failed to create/update profile: {result.get('error')}")
             return False
         
-        # Read profile
-        print("   Reading profile...")
-        profile = mongodb.get_user_profile(test_user_id)
+        # Read profile + list users in one aggregation
+        print("   Reading profile and listing users...")
+        fetched = mongodb.profile_and_users(test_user_id)
+        profile = fetched.get("profile")
         if profile:
             print("   ✅ Profile retrieved successfully")
             print(f"      Name: {profile.get('name')}")
             print(f"      Goals: {profile.get('goals')}")
+            print(f"      Risk preference: {profile.get('risk_preference')}")
         else:
-            print("   ❌ Failed to retrieve profile")
+            print(f"   ❌ Failed to retrieve profile: {fetched.get('error', 'not found')}")
             return False
         
-        # Update profile
-        print("   Updating profile...")
-        updates = {"risk_preference": "aggressive"}
-        result = mongodb.update_user_profile(test_user_id, updates)
-        if result.get("success"):
-            print("   ✅ Profile updated successfully")
-        else:
-            print(f"   ❌ Failed to update profile: {result.get('error')}")
-        
-        # List users
-        print("   Listing all users...")
-        users = mongodb.list_all_users()
+        users = fetched.get("users", [])
         print(f"   ✅ Found {len(users)} user(s)")
         
         # Clean up test data (optional)
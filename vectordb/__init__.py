@@ -0,0 +1 @@
+# Initialize vectordb package
@@ -1,58 +1,339 @@
-import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import hashlib
+import io
+import string
+from html import escape
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Union
+import logging
 from llm.llm_client import LLMClient
-from llm.prompts import system_advisor
-from llm.json_guard import validate_json_response
-from app.tools.csv_tools import query_csv, spend_aggregate, top_merchants, describe_csv
 from app.tools.enhanced_csv_tools import (
     extract_year_data, extract_year_range_data, extract_month_data, 
     extract_date_range_data, parse_historical_query, get_available_years,
-    format_currency, format_date
+    format_currency, get_user_csv_path
 )
-from app.tools.visualization import generate_visualizations, generate_dynamic_visualizations
+
+# Chart imports happen once here; without matplotlib the SVG writer is used instead
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+except ImportError:
+    Figure = None
+
+logger = logging.getLogger(__name__)
+
+# A chart is a file:// URL, or (bytes, mime type) when rendered in memory
+ChartResult = Union[str, Tuple[bytes, str]]
+
+# Chart output format for historical charts: "png" (matplotlib) or "svg" (string templates, no matplotlib)
+CHART_FORMAT = (os.getenv("HISTORICAL_CHART_FORMAT", "png") or "png").lower()
+if Figure is None:
+    CHART_FORMAT = "svg"
+
+_SVG_MARGIN = {"top": 60, "right": 40, "bottom": 70, "left": 90}
+
+# Keywords that mark a message as a historical-analysis request; one case-insensitive scan
+_HIST_KEYWORDS = frozenset({
+    '2018', '2019', '2020', '2021', '2022', '2023', '2024',
+    'historical', 'history', 'past', 'previous', 'earlier', 'year', 'years', 'month', 'months',
+    'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+    'september', 'october', 'november', 'december',
+    'from', 'to', 'between', 'range', 'period',
+})
+# Multi-word keywords the token set cannot see; only consulted when the set misses
+_HIST_PHRASE_RE = re.compile(r"\b(?:expenditure|spending|expense) analysis\b", re.IGNORECASE)
+_TOKEN_STRIP = string.punctuation + "₹"
+
+# Parsed query types whose computed summary is a complete answer for short questions
+_DIRECT_QUERY_TYPES = frozenset({'year', 'month', 'date_range'})
+# Longer questions usually carry a narrative ask ("why", "compare", "what should I") that needs the LLM
+DIRECT_ANSWER_MAX_WORDS = int(os.getenv("HISTORICAL_DIRECT_MAX_WORDS", "8"))
+
+# LLM prompt for historical answers; only the summary, chart list and question vary per call
+_PROMPT_TEMPLATE = """
+HISTORICAL DATA ANALYSIS:
+{summary}
+
+CHARTS GENERATED:
+{charts}
+
+User Question: {message}
+
+Instructions:
+- Provide a concise analysis based on the computed data above
+- Reference specific numbers and trends from the data
+- Mention the charts that were generated
+- Be direct and data-driven
+- Use Indian Rupee formatting (₹) with commas
+- Don't make up numbers - only use what's computed above
+"""
+
+# Fixed matplotlib margins per figsize (replaces bbox_inches='tight'); barh figures need room for labels
+_FIGURE_MARGINS = {
+    (12, 6): dict(left=0.09, right=0.97, top=0.88, bottom=0.18),
+    (12, 8): dict(left=0.20, right=0.92, top=0.90, bottom=0.08),
+}
+
+
+def _to_soa(items: List[Dict], label_key: str, limit: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+    """
+    Split rows of {label_key, monthly_expense_total} into parallel (labels, amounts);
+    amounts is one float64 array, which matplotlib takes without re-boxing each value.
+    """
+    if limit is not None:
+        items = items[:limit]
+    labels = [str(item[label_key]) for item in items]
+    amounts = np.fromiter((item['monthly_expense_total'] for item in items), dtype=np.float64, count=len(items))
+    return labels, amounts
+
+
+def _value_labels(amounts: np.ndarray) -> List[str]:
+    """Rupee labels for every bar/point, formatted in one pass"""
+    return [f'₹{a:,.0f}' for a in amounts.tolist()]
+
+
+# Rows kept per category/merchant breakdown; extractors select only these instead of sorting everything
+CHART_TOP_K = 10
+
+# Chart files kept in artifacts/ (all formats together); the least recently used are deleted beyond this
+CHART_CACHE_MAX_FILES = int(os.getenv("HISTORICAL_CHART_CACHE_MAX", "64"))
+
+# (chart key, data field, label field, row limit, builder method); category/merchant charts draw the top k
+_CHART_SPECS = (
+    ('yearly_trend', 'yearly_breakdown', 'year', None, '_create_yearly_trend_chart'),
+    ('monthly_breakdown', 'monthly_breakdown', 'month_name', None, '_create_monthly_breakdown_chart'),
+    ('category_breakdown', 'categories', 'category', CHART_TOP_K, '_create_category_breakdown_chart'),
+    ('top_merchants', 'top_merchants', 'merchant', CHART_TOP_K, '_create_top_merchants_chart'),
+)
+# Files written by _chart_path: "<chart key>_<16 hex digest>.<png|svg>"
+_CHART_FILE_RE = re.compile(
+    r"^(?:" + "|".join(spec[0] for spec in _CHART_SPECS) + r")_[0-9a-f]{16}\.(?:png|svg)$"
+)
+
+
+def _chart_views(historical_data: Dict[str, Any]) -> Dict[str, Tuple[List[str], np.ndarray]]:
+    """Slice and convert every breakdown once; charts and the summary both read these views"""
+    return {
+        key: _to_soa(historical_data[field], label_key, limit)
+        for key, field, label_key, limit, _ in _CHART_SPECS
+        if historical_data.get(field)
+    }
+
+
+def _svg_doc(title: str, body: str, width: int, height: int) -> str:
+    """Wrap chart elements in an <svg> root with a centered title"""
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="12">'
+        f'<rect width="{width}" height="{height}" fill="white"/>'
+        f'<text x="{width / 2:.1f}" y="32" text-anchor="middle" font-size="20" font-weight="bold">{escape(title)}</text>'
+        f'{body}</svg>'
+    )
+
+
+def _svg_bar_chart(labels: List[str], amounts: List[float], title: str, color: str,
+                   horizontal: bool = False, width: int = 960, height: int = 480) -> str:
+    """Bar chart as an SVG string; horizontal bars list the first item at the top"""
+    m = dict(_SVG_MARGIN, left=200) if horizontal else _SVG_MARGIN
+    pw, ph = width - m["left"] - m["right"], height - m["top"] - m["bottom"]
+    n = max(len(amounts), 1)
+    scale = (pw if horizontal else ph) / (max(amounts) or 1)
+    slot = (ph if horizontal else pw) / n
+    parts = []
+    for i, (label, amt) in enumerate(zip(labels, amounts)):
+        size = amt * scale
+        value = escape(f"₹{amt:,.0f}")
+        name = escape(str(label))
+        if horizontal:
+            y = m["top"] + i * slot + slot * 0.15
+            cy = y + slot * 0.35
+            parts.append(
+                f'<rect x="{m["left"]}" y="{y:.1f}" width="{size:.1f}" height="{slot * 0.7:.1f}" fill="{color}" fill-opacity="0.8"/>'
+                f'<text x="{m["left"] - 8}" y="{cy:.1f}" text-anchor="end" dominant-baseline="middle">{name}</text>'
+                f'<text x="{m["left"] + size + 6:.1f}" y="{cy:.1f}" dominant-baseline="middle" font-weight="bold">{value}</text>'
+            )
+        else:
+            x = m["left"] + i * slot + slot * 0.15
+            cx = x + slot * 0.35
+            y = m["top"] + ph - size
+            parts.append(
+                f'<rect x="{x:.1f}" y="{y:.1f}" width="{slot * 0.7:.1f}" height="{size:.1f}" fill="{color}" fill-opacity="0.8"/>'
+                f'<text x="{cx:.1f}" y="{y - 6:.1f}" text-anchor="middle" font-weight="bold">{value}</text>'
+                f'<text x="{cx:.1f}" y="{m["top"] + ph + 18}" text-anchor="middle">{name}</text>'
+            )
+    return _svg_doc(title, "".join(parts), width, height)
+
+
+def _svg_line_chart(labels: List[str], amounts: List[float], title: str, color: str,
+                    width: int = 960, height: int = 480) -> str:
+    """Line chart with shaded area and point labels as an SVG string"""
+    m = _SVG_MARGIN
+    pw, ph = width - m["left"] - m["right"], height - m["top"] - m["bottom"]
+    base_y = m["top"] + ph
+    scale = ph / (max(amounts) or 1)
+    slot = pw / max(len(amounts), 1)
+    pts = [(m["left"] + slot * (i + 0.5), base_y - amt * scale) for i, amt in enumerate(amounts)]
+    line = " ".join(f"{x:.1f},{y:.1f}" for x, y in pts)
+    area = f"{pts[0][0]:.1f},{base_y} {line} {pts[-1][0]:.1f},{base_y}" if pts else ""
+    parts = [
+        f'<polygon points="{area}" fill="{color}" fill-opacity="0.3"/>',
+        f'<polyline points="{line}" fill="none" stroke="{color}" stroke-width="2"/>',
+    ]
+    for (x, y), label, amt in zip(pts, labels, amounts):
+        parts.append(
+            f'<circle cx="{x:.1f}" cy="{y:.1f}" r="4" fill="{color}"/>'
+            f'<text x="{x:.1f}" y="{y - 10:.1f}" text-anchor="middle">{escape(f"₹{amt:,.0f}")}</text>'
+            f'<text x="{x:.1f}" y="{base_y + 18}" text-anchor="middle">{escape(str(label))}</text>'
+        )
+    return _svg_doc(title, "".join(parts), width, height)
+
 
 class HistoricalAnalysisOrchestrator:
     def __init__(self):
         self.llm_client = LLMClient()
         self.artifacts_dir = os.path.join(os.path.dirname(__file__), "artifacts")
-        self._ensure_artifacts_dir()
+        # Created on the first chart write, not at import (a global instance is built below)
+        self._dir_ready = False
+        # Reusable figures keyed by figsize, one set per thread (charts render in parallel);
+        # cleared between charts instead of reallocated
+        self._local = threading.local()
+        # Long-lived workers so each thread's cached figures survive across queries
+        self._chart_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="historical-chart")
+        # chart_path -> file:// URL for charts already rendered from identical input, in LRU order;
+        # bounded by CHART_CACHE_MAX_FILES and evicted entries' files are deleted
+        self._chart_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._chart_lock = threading.Lock()
+        self.chart_format = CHART_FORMAT
+        # get_available_years() loads the whole CSV; memoized as (csv mtime, years)
+        self._available_years: Optional[Tuple[Optional[float], List[int]]] = None
         
-    def _ensure_artifacts_dir(self):
-        """Create artifacts directory if it doesn't exist"""
-        if not os.path.exists(self.artifacts_dir):
-            os.makedirs(self.artifacts_dir)
+    def _need_dir(self):
+        """Create artifacts directory if it doesn't exist, adopting charts left by earlier runs"""
+        if not self._dir_ready:
+            os.makedirs(self.artifacts_dir, exist_ok=True)
+            # Oldest first, so files from previous processes are the first to be evicted
+            leftovers = []
+            for name in os.listdir(self.artifacts_dir):
+                if _CHART_FILE_RE.match(name):
+                    path = os.path.join(self.artifacts_dir, name)
+                    try:
+                        leftovers.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+            for _, path in sorted(leftovers):
+                self._remember_chart(path)
+            self._dir_ready = True
+    
+    def _figure(self, figsize: tuple):
+        """Return this thread's cached (fig, ax) for the figsize with the axes cleared"""
+        figures = getattr(self._local, "figures", None)
+        if figures is None:
+            figures = self._local.figures = {}
+        if figsize not in figures:
+            # Figure objects (not pyplot) carry no global state, so threads don't share them
+            fig = Figure(figsize=figsize)
+            ax = fig.subplots()
+            fig.subplots_adjust(**_FIGURE_MARGINS.get(figsize, {}))
+            figures[figsize] = (fig, ax)
+        fig, ax = figures[figsize]
+        ax.clear()
+        return fig, ax
+    
+    def _chart_path(self, name: str, labels: List[str], amounts: np.ndarray) -> str:
+        """Artifact path keyed by a hash of the chart input, so identical data maps to one file"""
+        h = hashlib.blake2b(repr(labels).encode("utf-8"), digest_size=8)
+        h.update(amounts.tobytes())
+        digest = h.hexdigest()
+        ext = "svg" if self.chart_format == "svg" else "png"
+        return os.path.join(self.artifacts_dir, f"{name}_{digest}.{ext}")
+    
+    def _cached_chart_url(self, chart_path: str) -> Optional[str]:
+        """URL of an already-rendered chart, or None if it has to be drawn"""
+        self._need_dir()
+        with self._chart_lock:
+            url = self._chart_cache.get(chart_path)
+            if url is not None:
+                self._chart_cache.move_to_end(chart_path)
+        if url is not None and not os.path.exists(chart_path):
+            # Deleted behind our back; forget it and redraw
+            with self._chart_lock:
+                self._chart_cache.pop(chart_path, None)
+            return None
+        return url
+    
+    def _remember_chart(self, chart_path: str) -> str:
+        """Record a written chart as most recently used and delete the files that fall off the LRU"""
+        url = f"file://{chart_path}"
+        evicted = []
+        with self._chart_lock:
+            self._chart_cache[chart_path] = url
+            self._chart_cache.move_to_end(chart_path)
+            while len(self._chart_cache) > CHART_CACHE_MAX_FILES:
+                evicted.append(self._chart_cache.popitem(last=False)[0])
+        for path in evicted:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return url
+    
+    def _save_figure(self, chart_path: str, fig, return_bytes: bool = False) -> ChartResult:
+        """Write a matplotlib chart and remember it in the chart cache, or return the PNG in memory"""
+        if return_bytes:
+            buf = io.BytesIO()
+            fig.savefig(buf, format='png', dpi=100)
+            return buf.getvalue(), 'image/png'
+        self._need_dir()
+        fig.savefig(chart_path, dpi=100)
+        return self._remember_chart(chart_path)
     
-    def _is_historical_query(self, message: str) -> bool:
+    def _save_svg(self, chart_path: str, svg: str, return_bytes: bool = False) -> ChartResult:
+        """Write an SVG chart and remember it in the chart cache, or return it in memory"""
+        if return_bytes:
+            return svg.encode('utf-8'), 'image/svg+xml'
+        self._need_dir()
+        with open(chart_path, "w", encoding="utf-8") as f:
+            f.write(svg)
+        return self._remember_chart(chart_path)
+    
+    def _years(self) -> List[int]:
+        """Available years, re-read only when the CSV's mtime changes (e.g. a new upload)"""
+        path = get_user_csv_path()
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        if self._available_years is None or self._available_years[0] != mtime:
+            self._available_years = (mtime, get_available_years())
+        return self._available_years[1]
+    
+    def _is_historical_query(self, message: str, parsed_query: Optional[Dict[str, Any]] = None) -> bool:
         """Check if the message is asking for historical analysis"""
-        historical_keywords = [
-            '2018', '2019', '2020', '2021', '2022', '2023', '2024',
-            'historical', 'history', 'past', 'previous', 'earlier',
-            'year', 'years', 'month', 'months', 'january', 'february',
-            'march', 'april', 'may', 'june', 'july', 'august',
-            'september', 'october', 'november', 'december',
-            'expenditure analysis', 'spending analysis', 'expense analysis',
-            'from', 'to', 'between', 'range', 'period'
-        ]
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in historical_keywords)
+        # A parse that found a year, month or date range already answers the question
+        if parsed_query and parsed_query.get('query_type', 'general') != 'general':
+            return True
+        tokens = {word.strip(_TOKEN_STRIP) for word in message.lower().split()}
+        return bool(_HIST_KEYWORDS & tokens) or bool(_HIST_PHRASE_RE.search(message))
     
-    def _extract_historical_data(self, message: str) -> Dict[str, Any]:
-        """Extract historical data based on the query"""
+    def _extract_historical_data(self, parsed_query: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract historical data based on the parsed query (see parse_historical_query)"""
         try:
-            parsed_query = parse_historical_query(message)
-            
             if parsed_query['query_type'] == 'year':
                 years = parsed_query['years']
                 if len(years) == 1:
-                    return extract_year_data(years[0])
+                    return extract_year_data(years[0], top_k=CHART_TOP_K)
                 elif len(years) > 1:
-                    return extract_year_range_data(min(years), max(years))
+                    return extract_year_range_data(min(years), max(years), top_k=CHART_TOP_K)
                 else:
                     # No specific year mentioned, get available years
-                    available_years = get_available_years()
+                    available_years = self._years()
                     if available_years:
-                        return extract_year_data(available_years[-1])  # Most recent year
+                        return extract_year_data(available_years[-1], top_k=CHART_TOP_K)  # Most recent year
                     return {"error": "No data available", "data_available": False}
             
             elif parsed_query['query_type'] == 'month':
@@ -61,71 +342,68 @@ class HistoricalAnalysisOrchestrator:
                 if years:
                     year = years[0]
                 else:
-                    available_years = get_available_years()
+                    available_years = self._years()
                     year = available_years[-1] if available_years else 2023
                 
                 if months:
-                    return extract_month_data(year, months[0])
+                    return extract_month_data(year, months[0], top_k=CHART_TOP_K)
                 else:
-                    return extract_year_data(year)
+                    return extract_year_data(year, top_k=CHART_TOP_K)
             
             elif parsed_query['query_type'] == 'date_range':
                 start_date, end_date = parsed_query['date_range']
-                return extract_date_range_data(start_date, end_date)
+                return extract_date_range_data(start_date, end_date, top_k=CHART_TOP_K)
             
             else:
                 # General historical query - get most recent year
-                available_years = get_available_years()
+                available_years = self._years()
                 if available_years:
-                    return extract_year_data(available_years[-1])
+                    return extract_year_data(available_years[-1], top_k=CHART_TOP_K)
                 return {"error": "No data available", "data_available": False}
                 
         except Exception as e:
             return {"error": str(e), "data_available": False}
     
-    def _generate_historical_charts(self, historical_data: Dict[str, Any], message: str) -> Dict[str, str]:
-        """Generate charts for historical data"""
+    def _generate_historical_charts(self, historical_data: Dict[str, Any], message: str,
+                                    views: Optional[Dict[str, Tuple[List[str], np.ndarray]]] = None,
+                                    return_bytes: bool = False) -> Dict[str, ChartResult]:
+        """
+        Generate charts for historical data. Values are file:// URLs, or with return_bytes
+        (in-process callers) (bytes, mime type) pairs that never touch the artifacts dir.
+        """
         try:
             if not historical_data.get('data_available', False):
                 return {}
+            if views is None:
+                views = _chart_views(historical_data)
             
-            charts = {}
-            
-            # Generate time series chart for yearly data
-            if 'yearly_breakdown' in historical_data and historical_data['yearly_breakdown']:
-                charts['yearly_trend'] = self._create_yearly_trend_chart(historical_data['yearly_breakdown'])
-            
-            # Generate monthly breakdown chart
-            if 'monthly_breakdown' in historical_data and historical_data['monthly_breakdown']:
-                charts['monthly_breakdown'] = self._create_monthly_breakdown_chart(historical_data['monthly_breakdown'])
-            
-            # Generate category breakdown chart
-            if 'categories' in historical_data and historical_data['categories']:
-                charts['category_breakdown'] = self._create_category_breakdown_chart(historical_data['categories'])
-            
-            # Generate top merchants chart
-            if 'top_merchants' in historical_data and historical_data['top_merchants']:
-                charts['top_merchants'] = self._create_top_merchants_chart(historical_data['top_merchants'])
-            
-            return charts
-            
-        except Exception as e:
-            print(f"Error generating historical charts: {e}")
+            # (chart key, builder, (labels, amounts)) for every breakdown present in the data
+            tasks = [(key, getattr(self, builder), views[key]) for key, _, _, _, builder in _CHART_SPECS if key in views]
+            if len(tasks) <= 1:
+                urls = {key: fn(*soa, return_bytes=return_bytes) for key, fn, soa in tasks}
+            else:
+                # Render + encode + write are independent per chart; Agg/zlib release the GIL
+                futures = {key: self._chart_pool.submit(fn, *soa, return_bytes=return_bytes) for key, fn, soa in tasks}
+                urls = {key: f.result() for key, f in futures.items()}
+            # Failed charts come back as "" and are left out
+            return {key: url for key, url in urls.items() if url}
+            
+        except Exception:
+            logger.exception("Error generating historical charts")
             return {}
     
-    def _create_yearly_trend_chart(self, yearly_data: List[Dict]) -> str:
+    def _create_yearly_trend_chart(self, years: List[str], amounts: np.ndarray, return_bytes: bool = False) -> ChartResult:
         """Create a yearly trend chart"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')
-            import base64
-            import io
+            chart_path = self._chart_path("yearly_trend", years, amounts)
+            cached = None if return_bytes else self._cached_chart_url(chart_path)
+            if cached:
+                return cached
             
-            years = [str(item['year']) for item in yearly_data]
-            amounts = [item['monthly_expense_total'] for item in yearly_data]
+            if self.chart_format == "svg":
+                return self._save_svg(chart_path, _svg_line_chart(years, amounts, 'Yearly Spending Trend', '#2E86AB'), return_bytes)
             
-            fig, ax = plt.subplots(figsize=(12, 6))
+            fig, ax = self._figure((12, 6))
             ax.plot(years, amounts, marker='o', linewidth=2, markersize=6, color='#2E86AB')
             ax.fill_between(years, amounts, alpha=0.3, color='#2E86AB')
             
@@ -135,40 +413,33 @@ class HistoricalAnalysisOrchestrator:
             ax.grid(True, alpha=0.3)
             
             # Add value labels on points
-            for i, (year, amount) in enumerate(zip(years, amounts)):
-                ax.annotate(f'₹{amount:,.0f}', (year, amount), 
+            for year, amount, label in zip(years, amounts, _value_labels(amounts)):
+                ax.annotate(label, (year, amount), 
                            textcoords="offset points", xytext=(0,10), ha='center')
             
             # Save to artifacts directory
-            chart_path = os.path.join(self.artifacts_dir, f"yearly_trend_{years[0]}_{years[-1]}.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return f"file://{chart_path}"
+            return self._save_figure(chart_path, fig, return_bytes)
             
-        except Exception as e:
-            return f"Error creating yearly trend chart: {str(e)}"
+        except Exception:
+            logger.exception("Error creating yearly trend chart")
+            return ""
     
-    def _create_monthly_breakdown_chart(self, monthly_data: List[Dict]) -> str:
+    def _create_monthly_breakdown_chart(self, months: List[str], amounts: np.ndarray, return_bytes: bool = False) -> ChartResult:
         """Create a monthly breakdown chart"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')
-            import base64
-            import io
+            chart_path = self._chart_path("monthly_breakdown", months, amounts)
+            cached = None if return_bytes else self._cached_chart_url(chart_path)
+            if cached:
+                return cached
             
-            months = [item['month_name'] for item in monthly_data]
-            amounts = [item['monthly_expense_total'] for item in monthly_data]
+            if self.chart_format == "svg":
+                return self._save_svg(chart_path, _svg_bar_chart(months, amounts, 'Monthly Spending Breakdown', '#A23B72'), return_bytes)
             
-            fig, ax = plt.subplots(figsize=(12, 6))
+            fig, ax = self._figure((12, 6))
             bars = ax.bar(months, amounts, color='#A23B72', alpha=0.8)
             
             # Add value labels on bars
-            for bar, amount in zip(bars, amounts):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                       f'₹{amount:,.0f}', ha='center', va='bottom', fontweight='bold')
+            ax.bar_label(bars, labels=_value_labels(amounts), padding=3, fontweight='bold')
             
             ax.set_title('Monthly Spending Breakdown', fontsize=16, fontweight='bold', pad=20)
             ax.set_xlabel('Month', fontsize=12)
@@ -176,134 +447,128 @@ class HistoricalAnalysisOrchestrator:
             ax.tick_params(axis='x', rotation=45)
             
             # Save to artifacts directory
-            chart_path = os.path.join(self.artifacts_dir, "monthly_breakdown.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            plt.close()
+            return self._save_figure(chart_path, fig, return_bytes)
             
-            return f"file://{chart_path}"
-            
-        except Exception as e:
-            return f"Error creating monthly breakdown chart: {str(e)}"
+        except Exception:
+            logger.exception("Error creating monthly breakdown chart")
+            return ""
     
-    def _create_category_breakdown_chart(self, categories: List[Dict]) -> str:
+    def _create_category_breakdown_chart(self, cat_names: List[str], amounts: np.ndarray, return_bytes: bool = False) -> ChartResult:
         """Create a category breakdown chart"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')
-            import base64
-            import io
-            
-            # Take top 10 categories
-            top_categories = categories[:10]
-            cat_names = [item['category'] for item in top_categories]
-            amounts = [item['monthly_expense_total'] for item in top_categories]
-            
-            fig, ax = plt.subplots(figsize=(12, 8))
+            chart_path = self._chart_path("category_breakdown", cat_names, amounts)
+            cached = None if return_bytes else self._cached_chart_url(chart_path)
+            if cached:
+                return cached
+            
+            if self.chart_format == "svg":
+                return self._save_svg(chart_path, _svg_bar_chart(cat_names, amounts, 'Spending by Category', '#F18F01', horizontal=True, height=640), return_bytes)
+            
+            fig, ax = self._figure((12, 8))
             bars = ax.barh(cat_names, amounts, color='#F18F01', alpha=0.8)
             
             # Add value labels
-            for i, (bar, amount) in enumerate(zip(bars, amounts)):
-                width = bar.get_width()
-                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+            ax.bar_label(bars, labels=_value_labels(amounts), padding=3, fontweight='bold')
             
             ax.set_title('Spending by Category', fontsize=16, fontweight='bold', pad=20)
             ax.set_xlabel('Amount Spent (INR)', fontsize=12)
             ax.set_ylabel('Category', fontsize=12)
             
             # Save to artifacts directory
-            chart_path = os.path.join(self.artifacts_dir, "category_breakdown.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return f"file://{chart_path}"
+            return self._save_figure(chart_path, fig, return_bytes)
             
-        except Exception as e:
-            return f"Error creating category breakdown chart: {str(e)}"
+        except Exception:
+            logger.exception("Error creating category breakdown chart")
+            return ""
     
-    def _create_top_merchants_chart(self, merchants: List[Dict]) -> str:
+    def _create_top_merchants_chart(self, merchant_names: List[str], amounts: np.ndarray, return_bytes: bool = False) -> ChartResult:
         """Create a top merchants chart"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')
-            import base64
-            import io
-            
-            # Take top 10 merchants
-            top_merchants = merchants[:10]
-            merchant_names = [item['merchant'] for item in top_merchants]
-            amounts = [item['monthly_expense_total'] for item in top_merchants]
-            
-            fig, ax = plt.subplots(figsize=(12, 8))
+            chart_path = self._chart_path("top_merchants", merchant_names, amounts)
+            cached = None if return_bytes else self._cached_chart_url(chart_path)
+            if cached:
+                return cached
+            
+            if self.chart_format == "svg":
+                return self._save_svg(chart_path, _svg_bar_chart(merchant_names, amounts, 'Top Merchants by Spending', '#C73E1D', horizontal=True, height=640), return_bytes)
+            
+            fig, ax = self._figure((12, 8))
             bars = ax.barh(merchant_names, amounts, color='#C73E1D', alpha=0.8)
             
             # Add value labels
-            for i, (bar, amount) in enumerate(zip(bars, amounts)):
-                width = bar.get_width()
-                ax.text(width + width*0.01, bar.get_y() + bar.get_height()/2,
-                       f'₹{amount:,.0f}', ha='left', va='center', fontweight='bold')
+            ax.bar_label(bars, labels=_value_labels(amounts), padding=3, fontweight='bold')
             
             ax.set_title('Top Merchants by Spending', fontsize=16, fontweight='bold', pad=20)
             ax.set_xlabel('Amount Spent (INR)', fontsize=12)
             ax.set_ylabel('Merchant', fontsize=12)
             
             # Save to artifacts directory
-            chart_path = os.path.join(self.artifacts_dir, "top_merchants.png")
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            return f"file://{chart_path}"
+            return self._save_figure(chart_path, fig, return_bytes)
             
-        except Exception as e:
-            return f"Error creating top merchants chart: {str(e)}"
+        except Exception:
+            logger.exception("Error creating top merchants chart")
+            return ""
     
-    def _format_historical_summary(self, historical_data: Dict[str, Any]) -> str:
+    def _format_historical_summary(self, historical_data: Dict[str, Any],
+                                   views: Optional[Dict[str, Tuple[List[str], np.ndarray]]] = None) -> str:
         """Format a concise summary of historical data"""
         if not historical_data.get('data_available', False):
             return "No data available for the requested period."
+        if views is None:
+            views = _chart_views(historical_data)
         
+        _fc = format_currency
         summary_parts = []
         
         # Basic stats
         if 'year' in historical_data:
-            year = historical_data['year']
-            total_spent = historical_data.get('total_spent', 0)
-            total_transactions = historical_data.get('total_transactions', 0)
-            summary_parts.append(f"**{year} Analysis:**")
-            summary_parts.append(f"• Total spent: {format_currency(total_spent)}")
-            summary_parts.append(f"• Transactions: {total_transactions:,}")
-        
+            heading = f"**{historical_data['year']} Analysis:**"
         elif 'start_year' in historical_data and 'end_year' in historical_data:
-            start_year = historical_data['start_year']
-            end_year = historical_data['end_year']
-            total_spent = historical_data.get('total_spent', 0)
-            total_transactions = historical_data.get('total_transactions', 0)
-            summary_parts.append(f"**{start_year}-{end_year} Analysis:**")
-            summary_parts.append(f"• Total spent: {format_currency(total_spent)}")
-            summary_parts.append(f"• Transactions: {total_transactions:,}")
+            heading = f"**{historical_data['start_year']}-{historical_data['end_year']} Analysis:**"
+        else:
+            heading = None
+        if heading:
+            summary_parts += [
+                heading,
+                f"• Total spent: {_fc(historical_data.get('total_spent', 0))}",
+                f"• Transactions: {historical_data.get('total_transactions', 0):,}",
+            ]
         
-        # Top categories
-        if 'categories' in historical_data and historical_data['categories']:
-            top_categories = historical_data['categories'][:5]
-            summary_parts.append(f"• **Top Categories:**")
-            for cat in top_categories:
-                summary_parts.append(f"  - {cat['category']}: {format_currency(cat['monthly_expense_total'])}")
+        # Top categories (first 5 of the chart's top 10)
+        if 'category_breakdown' in views:
+            names, amounts = views['category_breakdown']
+            summary_parts.append("• **Top Categories:**")
+            summary_parts.append("\n".join(
+                f"  - {name}: {_fc(amount)}" for name, amount in zip(names[:5], amounts[:5].tolist())
+            ))
         
-        # Monthly breakdown if available
-        if 'monthly_breakdown' in historical_data and historical_data['monthly_breakdown']:
-            summary_parts.append(f"• **Monthly Breakdown:**")
-            for month in historical_data['monthly_breakdown'][:6]:  # Show top 6 months
-                summary_parts.append(f"  - {month['month_name']}: {format_currency(month['monthly_expense_total'])}")
+        # Monthly breakdown if available (top 6 months)
+        if 'monthly_breakdown' in views:
+            names, amounts = views['monthly_breakdown']
+            summary_parts.append("• **Monthly Breakdown:**")
+            summary_parts.append("\n".join(
+                f"  - {name}: {_fc(amount)}" for name, amount in zip(names[:6], amounts[:6].tolist())
+            ))
         
         return "\n".join(summary_parts)
     
-    def process_historical_query(self, message: str, context: List[Dict[str, str]] = None) -> Dict[str, Any]:
-        """Process a historical analysis query"""
+    def _summary_answers_query(self, message: str, parsed_query: Dict[str, Any]) -> bool:
+        """Short year/month/range lookups are fully answered by the computed summary and charts"""
+        return (
+            parsed_query.get('query_type') in _DIRECT_QUERY_TYPES
+            and len(message.split()) < DIRECT_ANSWER_MAX_WORDS
+        )
+    
+    def process_historical_query(self, message: str, context: List[Dict[str, str]] = None, always_llm: bool = False,
+                                 return_bytes: bool = False) -> Dict[str, Any]:
+        """
+        Process a historical analysis query; pass always_llm=True to force a narrative LLM answer.
+        return_bytes=True puts (bytes, mime type) charts in the response instead of file:// URLs.
+        """
         try:
             # Extract historical data
-            historical_data = self._extract_historical_data(message)
+            parsed_query = parse_historical_query(message)
+            historical_data = self._extract_historical_data(parsed_query)
             
             if not historical_data.get('data_available', False):
                 return {
@@ -312,30 +577,31 @@ class HistoricalAnalysisOrchestrator:
                     "type": "text"
                 }
             
+            # One pass over the breakdown rows, shared by the charts and the summary
+            views = _chart_views(historical_data)
+            
             # Generate charts
-            charts = self._generate_historical_charts(historical_data, message)
+            charts = self._generate_historical_charts(historical_data, message, views, return_bytes=return_bytes)
             
             # Format summary
-            summary = self._format_historical_summary(historical_data)
+            summary = self._format_historical_summary(historical_data, views)
+            
+            # Skip the LLM round-trip when the summary already is the answer
+            if not always_llm and self._summary_answers_query(message, parsed_query):
+                return {
+                    "answer": summary,
+                    "status": "success",
+                    "type": "historical_analysis",
+                    "data": historical_data,
+                    "charts": charts
+                }
             
             # Create LLM prompt with data context
-            data_context = f"""
-HISTORICAL DATA ANALYSIS:
-{summary}
-
-CHARTS GENERATED:
-{', '.join(charts.keys()) if charts else 'No charts available'}
-
-User Question: {message}
-
-Instructions:
-- Provide a concise analysis based on the computed data above
-- Reference specific numbers and trends from the data
-- Mention the charts that were generated
-- Be direct and data-driven
-- Use Indian Rupee formatting (₹) with commas
-- Don't make up numbers - only use what's computed above
-"""
+            data_context = _PROMPT_TEMPLATE.format(
+                summary=summary,
+                charts=", ".join(charts) or "No charts available",
+                message=message,
+            )
             
             # Get LLM response
             response = self.llm_client.complete(data_context)
@@ -361,6 +627,7 @@ Instructions:
 # Create global instance
 historical_orchestrator = HistoricalAnalysisOrchestrator()
 
-def process_historical_query(message: str, context: List[Dict[str, str]] = None) -> Dict[str, Any]:
+def process_historical_query(message: str, context: List[Dict[str, str]] = None, always_llm: bool = False,
+                             return_bytes: bool = False) -> Dict[str, Any]:
     """Main function for processing historical queries"""
-    return historical_orchestrator.process_historical_query(message, context)
+    return historical_orchestrator.process_historical_query(message, context, always_llm=always_llm, return_bytes=return_bytes)
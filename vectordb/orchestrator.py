@@ -1,11 +1,22 @@
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+from functools import cached_property, lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import date
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from llm.llm_client import LLMClient
 from llm.prompts import system_advisor
 from llm.json_guard import validate_json_response
-from app.tools.csv_tools import query_csv, spend_aggregate, top_merchants, describe_csv
+from app.tools.csv_tools import query_csv, spend_aggregate, top_merchants, describe_csv, get_user_csv_path
 from app.tools.visualization import generate_visualizations, generate_dynamic_visualizations
+from vectordb.semantic_cache import SemanticCache, default_embedder
 from app.tools.enhanced_csv_tools import (
     total_spend,
     monthly_spend,
@@ -15,6 +26,11 @@ from app.tools.enhanced_csv_tools import (
     time_coverage,
 )
 
+try:
+    from database.mongodb_service import get_mongodb_service
+except ImportError:
+    get_mongodb_service = None
+
 # VectorDB and Agent imports
 try:
     from vectordb.knowledge_store import get_knowledge_store
@@ -35,101 +51,416 @@ except ImportError:
     AnalysisAgent = None
     ImplementationAgent = None
 
+# Year/month patterns for _extract_year_month, compiled once
+_YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_MONTH_NUM_RE = re.compile(r"\b(1[0-2]|0?[1-9])\s*(?:/|-|\\s|,|\b)\s*(?:'?(?:19\d{2}|20\d{2}))?\b")
+_MONTH_NAMES = {
+    'january':1,'february':2,'march':3,'april':4,'may':5,'june':6,
+    'july':7,'august':8,'september':9,'sept':9,'october':10,'november':11,'december':12,
+    'jan':1,'feb':2,'mar':3,'apr':4,'jun':6,'jul':7,'aug':8,'oct':10,'nov':11,'dec':12
+}
+_MONTH_NAME_RE = re.compile(r"\b(" + "|".join(sorted(_MONTH_NAMES, key=len, reverse=True)) + r")\b")
+
+def _words(*words: str) -> frozenset:
+    """Keyword set that also accepts the plain plural ('chart' -> 'charts'), as the old substring scans did"""
+    return frozenset(words) | frozenset(w + "s" for w in words)
+
+def _phrases(*phrases: str):
+    """One compiled alternation for the multi-word keywords a token set can't see"""
+    return re.compile(r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b")
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+def _has_keyword(msg: str, tokens: frozenset, words: frozenset, phrases=None) -> bool:
+    """msg is already lowercased; tokens is _WORD_RE.findall(msg) as a set"""
+    return not words.isdisjoint(tokens) or bool(phrases and phrases.search(msg))
+
+# Keyword sets for routing; tokens are matched by set intersection, phrases by one regex scan
+_CHART_KW = _words(
+    'chart', 'graph', 'plot', 'visualize', 'visualization', 'display', 'picture', 'image',
+    'diagram', 'breakdown', 'analysis', 'trend', 'pattern', 'comparison', 'distribution',
+    'pie', 'bar', 'line', 'histogram', 'monthly', 'daily', 'weekly', 'timeline', 'amount',
+    'spending', 'category', 'categories', 'merchant', 'top', 'highest', 'compare', 'vs',
+    'versus', 'create', 'generate', 'make', 'expenditure',
+)
+_CHART_PHRASES_RE = _phrases('show me', 'over time')
+# Words that force charts on even when _should_generate_charts says no
+_CHART_FORCE_KW = _words(
+    'analyze', 'analysis', 'breakdown', 'insight', 'overview', 'show', 'plot', 'chart',
+    'graph', 'visualize', 'expenditure', 'spending',
+)
+# Substrings generate_dynamic_visualizations maps to per-transaction charts (daily, amount histogram);
+# any other chart is fine with month-level totals
+_ROW_LEVEL_CHART_HINTS = ('day', 'daily', 'amount', 'histogram')
+_DATA_KW = _words(
+    'spending', 'expense', 'budget', 'category', 'categories', 'monthly', 'historical', 'trend',
+    'pattern', 'analysis', 'breakdown', 'summary', 'total', 'merchant', 'chart', 'graph', 'plot',
+    'visualize', 'data', 'transaction', 'update', 'dashboard', 'current', 'latest', 'status',
+    'show', 'financial',
+)
+_DATA_PHRASES_RE = _phrases('how much', 'what did', 'when did', 'where did', 'tell me about', 'my money')
+def _is_data_query(message_lower: str) -> bool:
+    """Whether the (already lowercased) question needs the transaction data context at all"""
+    return _has_keyword(message_lower, frozenset(_WORD_RE.findall(message_lower)), _DATA_KW, _DATA_PHRASES_RE)
+
+# Intents for _get_specific_analysis, found in one scan; branches still run in their fixed priority
+_INTENT_RE = re.compile(
+    r"\b(?:"
+    r"(?P<monthly>monthly|months?)"
+    r"|(?P<category>categor(?:y|ies)|spending by|top spending)"
+    r"|(?P<merchant>merchants?|where did|spent on)"
+    r"|(?P<summary>summary|overview|totals?|how much)"
+    r")\b"
+)
+
+# Per-user lookups repeated on every chat turn. CSV-derived ones are keyed by the file's mtime,
+# so an upload invalidates them; the subscription tier is re-read after SUBSCRIPTION_TTL_SECONDS.
+SUBSCRIPTION_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_TTL_SECONDS", "60"))
+
+def _csv_mtime(user_id: Optional[str]) -> Optional[float]:
+    path = get_user_csv_path(user_id=user_id)
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+@lru_cache(maxsize=256)
+def _cached_describe_csv(user_id: Optional[str], mtime: Optional[float]) -> Dict[str, Any]:
+    return describe_csv(user_id=user_id)
+
+@lru_cache(maxsize=256)
+def _cached_time_coverage(user_id: Optional[str], mtime: Optional[float]) -> Dict[str, Any]:
+    return time_coverage(user_id=user_id)
+
+@lru_cache(maxsize=256)
+def _cached_subscription(user_id: Optional[str], ttl_bucket: int) -> Dict[str, Any]:
+    if get_mongodb_service is None:
+        return {"tier": "free"}
+    return get_mongodb_service().get_user_subscription(user_id)
+
+def _subscription(user_id: Optional[str]) -> Dict[str, Any]:
+    return _cached_subscription(user_id, int(time.monotonic() // max(SUBSCRIPTION_TTL_SECONDS, 1)))
+
+# Column/sample context for craft_advisor_reply, keyed by the base CSV's mtime
+_advisor_ctx_cache: Dict[str, Any] = {"mtime": None, "text": None}
+
+# Shared workers for the chart-data reads in _get_comprehensive_data_context
+_VIZ_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix="viz-data")
+
+def _period_bounds(year: int, month: Optional[int] = None) -> Tuple[date, date]:
+    """[start, end) dates covering a whole year, or one month of it"""
+    if month:
+        return date(year, month, 1), date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+# Aggregates behind _get_specific_analysis, rendered to their context text. mtime is part of the
+# key only so an upload invalidates them.
+@lru_cache(maxsize=256)
+def _monthly_agg(user_id: Optional[str], mtime: Optional[float]) -> str:
+    monthly_data = query_csv("""
+        SELECT 
+            strftime('%Y-%m', date) as month,
+            SUM(amount) as total_spent,
+            COUNT(*) as transaction_count
+        FROM t 
+        GROUP BY strftime('%Y-%m', date) 
+        ORDER BY month DESC 
+        LIMIT 6
+    """, user_id=user_id)
+    if not monthly_data.get('rows'):
+        return ""
+    # Show only top 3 months
+    return "\n".join(["MONTHLY SPENDING:"] + [
+        f"- {row.get('month', 'N/A')}: ₹{row.get('total_spent', 0):,.0f}" for row in monthly_data['rows'][:3]
+    ])
+
+@lru_cache(maxsize=256)
+def _category_agg(user_id: Optional[str], mtime: Optional[float]) -> str:
+    category_breakdown = query_csv("""
+        SELECT 
+            category,
+            SUM(monthly_expense_total) as total
+        FROM t 
+        WHERE category IS NOT NULL AND category != ''
+        GROUP BY category 
+        ORDER BY total DESC 
+        LIMIT 5
+    """, user_id=user_id)
+    if not category_breakdown.get('rows'):
+        return ""
+    return "\n".join(["TOP SPENDING CATEGORIES:"] + [
+        f"- {row.get('category', 'Unknown')}: ₹{row.get('total', 0):,.0f}" for row in category_breakdown['rows']
+    ])
+
+@lru_cache(maxsize=256)
+def _merchant_agg(user_id: Optional[str], mtime: Optional[float]) -> str:
+    merchant_breakdown = query_csv("""
+        SELECT 
+            merchant,
+            SUM(amount) as total
+        FROM t 
+        WHERE merchant IS NOT NULL AND merchant != ''
+        GROUP BY merchant 
+        ORDER BY total DESC 
+        LIMIT 5
+    """, user_id=user_id)
+    if not merchant_breakdown.get('rows'):
+        return ""
+    return "\n".join(["TOP MERCHANTS:"] + [
+        f"- {row.get('merchant', 'Unknown')}: ₹{row.get('total', 0):,.0f}" for row in merchant_breakdown['rows']
+    ])
+
+@lru_cache(maxsize=256)
+def _filtered_agg(user_id: Optional[str], y: Optional[int], m: Optional[int], mtime: Optional[float]) -> str:
+    ts = total_spend(year=y, month=m, user_id=user_id)
+    parts = [f"FILTER: year={y or 'all'} month={m or 'all'}", f"- Total spent: ₹{ts.get('total', 0.0):,.0f}"]
+    cats = category_stats(year=y, month=m, user_id=user_id)
+    if cats.get("items"):
+        topcats = ", ".join(f"{it['category']}: ₹{it['spent']:,.0f}" for it in cats['items'][:3])
+        parts.append(f"- Top categories: {topcats}")
+    merch = merchant_stats(year=y, month=m, top_n=3, user_id=user_id)
+    if merch.get("items"):
+        topm = ", ".join(f"{it['merchant']}: ₹{it['spent']:,.0f}" for it in merch['items'])
+        parts.append(f"- Top merchants: {topm}")
+    return "\n".join(parts)
+
+@lru_cache(maxsize=256)
+def _summary_agg(user_id: Optional[str], mtime: Optional[float]) -> str:
+    summary_data = query_csv("""
+        SELECT 
+            SUM(monthly_expense_total) as total_spent,
+            COUNT(*) as transaction_count,
+            AVG(monthly_expense_total) as avg_transaction
+        FROM t
+    """, user_id=user_id)
+    if not summary_data.get('rows'):
+        return ""
+    row = summary_data['rows'][0]
+    return f"QUICK SUMMARY:\n- Total spent: ₹{row.get('total_spent', 0):,.0f}\n- Transactions: {row.get('transaction_count', 0)}\n- Avg per transaction: ₹{row.get('avg_transaction', 0):,.0f}\n"
+
+# Independent reads in _process_with_vectordb_workflow (knowledge, transactions, profile)
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-prefetch")
+
+def _gather_transaction_summary(user_id: Optional[str]) -> Dict[str, Any]:
+    """Spend totals and category breakdown handed to the strategy/analysis agents"""
+    total = total_spend(user_id=user_id)
+    monthly = monthly_spend(user_id=user_id)
+    categories = category_stats(user_id=user_id)
+    
+    # Get category breakdown for expenses
+    category_breakdown = {}
+    for item in categories.get('items', []):
+        cat_spent = item.get('spent', 0)
+        if cat_spent > 0:
+            category_breakdown[item.get('category', 'Unknown')] = cat_spent
+    
+    return {
+        'total_spend': total.get('total', 0),
+        'monthly_spend': monthly.get('recent_monthly', {}).get('total', 0) if monthly else 0,
+        'top_categories': [cat.get('category') for cat in categories.get('items', [])[:5]],
+        'category_breakdown': category_breakdown,
+        'savings_rate': 0  # Calculate if income data available
+    }
+
+PROFILE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'state', 'profile.json'
+)
+# Parsed profile.json, re-read only when its mtime changes
+_profile_cache: Dict[str, Any] = {"mtime": None, "data": {}}
+
+def _load_profile() -> Dict[str, Any]:
+    """state/profile.json, or {} when it hasn't been written yet"""
+    global _profile_cache
+    try:
+        mtime = os.stat(PROFILE_PATH).st_mtime
+    except OSError:
+        return {}
+    if mtime != _profile_cache["mtime"]:
+        with open(PROFILE_PATH, 'r') as f:
+            _profile_cache = {"mtime": mtime, "data": json.load(f)}
+    return _profile_cache["data"]
+
+NO_DATA_ANSWER = "I do not have access to your financial data yet. Please upload a CSV file in the Data Management section so I can help you."
+# Returned by _get_comprehensive_data_context when the user has no CSV; chat answers it without the LLM
+_NO_DATA_ALERT = (
+    "SYSTEM ALERT: NO DATA AVAILABLE. The user has NOT uploaded any transaction data. You MUST NOT provide "
+    f"any analysis, fake numbers, or dates. You MUST reply with exactly: '{NO_DATA_ANSWER}' Do not say anything else."
+)
+
+
+@dataclass(slots=True, frozen=True)
+class ChatResponse:
+    """One chat turn's result; turned into the JSON dict only at the API boundary (to_dict)"""
+    answer: str
+    status: str = "success"
+    type: str = "text"
+    visualizations: Optional[Dict[str, str]] = None
+    data: Optional[Dict[str, Any]] = None
+    # Any other keys the VectorDB workflow's output agent produced (sources, analysis, ...)
+    extra: Optional[Dict[str, Any]] = None
+
+    _FIELDS = frozenset({"answer", "status", "type", "visualizations", "data"})
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ChatResponse":
+        extra = {k: v for k, v in d.items() if k not in cls._FIELDS}
+        return cls(
+            answer=d.get("answer", ""),
+            status=d.get("status", "success"),
+            type=d.get("type", "text"),
+            visualizations=d.get("visualizations"),
+            data=d.get("data"),
+            extra=extra or None,
+        )
+
+    def approx_size(self) -> int:
+        """Rough footprint in bytes, dominated by the answer text and base64 charts"""
+        return len(self.answer) + sum(len(v) for v in (self.visualizations or {}).values() if isinstance(v, str))
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = dict(self.extra) if self.extra else {}
+        out.update(answer=self.answer, status=self.status, type=self.type)
+        if self.visualizations:
+            out["visualizations"] = self.visualizations
+        if self.data is not None:
+            out["data"] = self.data
+        return out
+
+
+def _no_data_response() -> ChatResponse:
+    return ChatResponse(NO_DATA_ANSWER)
+
+_ERR_TEMPLATE = MappingProxyType({"status": "error", "type": "error"})
+
+def _error_response(e: Exception) -> ChatResponse:
+    return ChatResponse(f"I apologize, but I encountered an error: {str(e)}", **_ERR_TEMPLATE)
+
+
+def _looks_like_json(text: str) -> bool:
+    """Cheap sniff before validate_json_response: an object/array or a ``` fenced block"""
+    return bool(text) and text.lstrip()[:1] in ("{", "[", "`")
+
+
+def _finish_reply(response: str, visualizations: Dict[str, Any]) -> ChatResponse:
+    """ChatResponse for an LLM reply to the data-context prompt, with its charts attached"""
+    answer, kind, data = response, ("visualization" if visualizations else "text"), None
+    # Only attempt JSON parsing when the reply could be JSON; plain text is kept as is
+    if _looks_like_json(response):
+        try:
+            json_response = validate_json_response(response)
+            answer, kind, data = json_response.get("answer", response), "json", json_response
+        except (ValueError, AttributeError):
+            pass
+    return ChatResponse(answer, type=kind, visualizations=visualizations or None, data=data)
+
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+def _query_facets(message_lower: str) -> tuple:
+    """Numbers and month names in the question; answers are never shared across different ones"""
+    return (tuple(_NUMBER_RE.findall(message_lower)),
+            tuple(_MONTH_NAMES[m] for m in _MONTH_NAME_RE.findall(message_lower)))
+
+def _context_key(context: Optional[List[Dict[str, str]]]) -> tuple:
+    """The last 5 messages, which is all of the conversation the prompt sees"""
+    return tuple((m.get('role', 'user'), m.get('content', '')) for m in (context or [])[-5:])
+
+CHAT_CACHE_MAXSIZE = int(os.getenv("CHAT_CACHE_MAXSIZE", "1024"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "300"))
+# Answers with charts carry base64 PNGs of a few MB each, so the cache is bounded by size too
+CHAT_CACHE_MAX_BYTES = int(os.getenv("CHAT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
 class EnhancedOrchestrator:
     def __init__(self):
         self.llm_client = LLMClient()
         
-        # Initialize VectorDB components if available
-        if VECTORDB_AVAILABLE:
-            try:
-                self.knowledge_store = get_knowledge_store()
-                self.parsing_agent = ParsingAgent(self.llm_client)
-                self.strategy_agent = StrategyAgent(self.llm_client)
-                self.risk_agent = RiskAgent(self.llm_client)
-                self.output_agent = OutputAgent()
-                self.analysis_agent = AnalysisAgent() if AnalysisAgent else None
-                self.implementation_agent = ImplementationAgent() if ImplementationAgent else None
-                self.use_vectordb = False # Streamlined for speed
-            except Exception as e:
-                print(f"Warning: VectorDB initialization failed: {e}. Continuing without VectorDB.")
-                self.use_vectordb = False
-                self.analysis_agent = None
-        else:
-            self.use_vectordb = False
-            self.analysis_agent = None
+        # VectorDB agents are built on first use (see the properties below); the workflow is
+        # switched off, so a normal chat never pays for them
+        self.use_vectordb = False # Streamlined for speed
+        
+        # Answered chats, reused for repeated or paraphrased questions; embeddings come from the
+        # knowledge store's embedder when the VectorDB path is on, else sentence-transformers if installed
+        embed_fn = getattr(self.knowledge_store, "embed", None) if self.use_vectordb else None
+        self.response_cache = SemanticCache(
+            embed_fn=embed_fn or default_embedder(),
+            threshold=float(os.getenv("CHAT_CACHE_THRESHOLD", "0.92")),
+            maxsize=CHAT_CACHE_MAXSIZE,
+            ttl=CHAT_CACHE_TTL_SECONDS,
+            max_bytes=CHAT_CACHE_MAX_BYTES,
+            weigh=ChatResponse.approx_size,
+        )
+    
+    @cached_property
+    def knowledge_store(self):
+        return get_knowledge_store() if VECTORDB_AVAILABLE else None
+    
+    @cached_property
+    def parsing_agent(self):
+        return ParsingAgent(self.llm_client) if ParsingAgent else None
+    
+    @cached_property
+    def strategy_agent(self):
+        return StrategyAgent(self.llm_client) if StrategyAgent else None
+    
+    @cached_property
+    def risk_agent(self):
+        return RiskAgent(self.llm_client) if RiskAgent else None
+    
+    @cached_property
+    def output_agent(self):
+        return OutputAgent() if OutputAgent else None
+    
+    @cached_property
+    def analysis_agent(self):
+        return AnalysisAgent() if AnalysisAgent else None
+    
+    @cached_property
+    def implementation_agent(self):
+        return ImplementationAgent() if ImplementationAgent else None
         
-    def _extract_year_month(self, message: str) -> tuple:
-        """Extract year and optional month integer from free-form text."""
-        import re
-        msg = message.lower()
+    def _extract_year_month(self, message_lower: str) -> tuple:
+        """Extract year and optional month integer from free-form (lowercased) text."""
+        msg = message_lower
         # Year: any 4-digit between 1900-2099
         year = None
-        m = re.search(r"\b(19\d{2}|20\d{2})\b", msg)
+        m = _YEAR_RE.search(msg)
         if m:
             year = int(m.group(1))
-        # Month by number or name
+        # Month by name first (leftmost mention), then numeric MM or M
         month = None
-        # numeric MM or M
-        mnum = re.search(r"\b(1[0-2]|0?[1-9])\s*(?:/|-|\\s|,|\b)\s*(?:'?(?:19\d{2}|20\d{2}))?\b", msg)
-        # month names
-        months = {
-            'january':1,'february':2,'march':3,'april':4,'may':5,'june':6,
-            'july':7,'august':8,'september':9,'sept':9,'october':10,'november':11,'december':12,
-            'jan':1,'feb':2,'mar':3,'apr':4,'jun':6,'jul':7,'aug':8,'oct':10,'nov':11,'dec':12
-        }
-        for name, idx in months.items():
-            if re.search(rf"\b{name}\b", msg):
-                month = idx
-                break
-        if month is None and mnum:
-            try:
+        mname = _MONTH_NAME_RE.search(msg)
+        if mname:
+            month = _MONTH_NAMES[mname.group(1)]
+        else:
+            mnum = _MONTH_NUM_RE.search(msg)
+            if mnum:
                 month = int(mnum.group(1))
-            except Exception:
-                month = None
         return year, month
 
-    def _should_generate_charts(self, message: str) -> bool:
-        """Determine if charts should be generated based on the message"""
-        chart_keywords = [
-            'chart', 'graph', 'plot', 'visualize', 'visualization', 'show me',
-            'display', 'picture', 'image', 'diagram', 'breakdown', 'analysis',
-            'trend', 'pattern', 'comparison', 'distribution', 'pie', 'bar', 'line',
-            'histogram', 'monthly', 'daily', 'weekly', 'timeline', 'over time',
-            'amount', 'spending', 'category', 'merchant', 'top', 'highest',
-            'compare', 'vs', 'versus', 'create', 'generate', 'make', 'expenditure'
-        ]
-        return any(keyword in message.lower() for keyword in chart_keywords)
-
-    def _get_comprehensive_data_context(self, message: str, user_id: Optional[str] = None) -> tuple:
+    def _should_generate_charts(self, message_lower: str, tokens: Optional[frozenset] = None) -> bool:
+        """Determine if charts should be generated based on the (lowercased) message"""
+        if tokens is None:
+            tokens = frozenset(_WORD_RE.findall(message_lower))
+        return _has_keyword(message_lower, tokens, _CHART_KW, _CHART_PHRASES_RE)
+
+    def _get_comprehensive_data_context(self, message: str, user_id: Optional[str] = None,
+                                        message_lower: Optional[str] = None) -> tuple:
         """
-        Get comprehensive data context for the LLM based on the user's question
+        Get comprehensive data context for the LLM based on the user's question.
+        Callers gate this on _is_data_query, so non-data questions never get here.
         """
         try:
-            # Check if this is a data-related question
-            data_keywords = [
-                'spending', 'expense', 'budget', 'category', 'monthly', 'historical',
-                'trend', 'pattern', 'analysis', 'breakdown', 'summary', 'total',
-                'how much', 'what did', 'when did', 'where did', 'merchant', 'chart',
-                'graph', 'plot', 'visualize', 'show me', 'data', 'transaction', 'update',
-                'dashboard', 'current', 'latest', 'status', 'tell me about', 'show',
-                'spending habits', 'my money', 'financial', 'how much'
-            ]
-            
-            if not any(keyword in message.lower() for keyword in data_keywords):
-                return "", {}
+            msg = message_lower if message_lower is not None else message.lower()
+            tokens = frozenset(_WORD_RE.findall(msg))
             
             # Get basic data context (always needed for data questions)
-            csv_info = describe_csv(user_id=user_id)
+            mtime = _csv_mtime(user_id)
+            csv_info = _cached_describe_csv(user_id, mtime)
             
             # Get subscription info
-            from database.mongodb_service import get_mongodb_service
-            db = get_mongodb_service()
-            sub = db.get_user_subscription(user_id)
+            sub = _subscription(user_id)
             tier = sub.get("tier", "free")
-
-            # Build context based on question type
-            context_parts = []
-            context_parts.append(f"USER SUBSCRIPTION TIER: {tier.upper()}")
             
             # Basic data overview
             row_count = csv_info.get('row_estimate', 0)
@@ -142,28 +473,29 @@ class EnhancedOrchestrator:
 
             if rc == 0:
                 # Double check with a direct path check if row_estimate failed
-                from app.tools.csv_tools import get_user_csv_path
-                path = get_user_csv_path(user_id=user_id)
-                if not path:
-                     return "SYSTEM ALERT: NO DATA AVAILABLE. The user has NOT uploaded any transaction data. You MUST NOT provide any analysis, fake numbers, or dates. You MUST reply with exactly: 'I do not have access to your financial data yet. Please upload a CSV file in the Data Management section so I can help you.' Do not say anything else.", {}
-
-            context_parts.append(f"DATA OVERVIEW:")
-            context_parts.append(f"- Total records: {row_count}")
-            context_parts.append(f"- Date range: {self._get_date_range(user_id=user_id)}")
+                if mtime is None:
+                     return _NO_DATA_ALERT, {}
+
+            # Build context based on question type
+            context_parts = [
+                f"USER SUBSCRIPTION TIER: {tier.upper()}",
+                "DATA OVERVIEW:",
+                f"- Total records: {row_count}",
+                f"- Date range: {self._get_date_range(user_id=user_id, mtime=mtime)}",
+            ]
             
             # Extract year/month intent
-            year, month = self._extract_year_month(message)
+            year, month = self._extract_year_month(msg)
             
             # Get specific data based on question type
-            specific_analysis = self._get_specific_analysis(message, user_id=user_id)
+            specific_analysis = self._get_specific_analysis(msg, user_id=user_id, mtime=mtime)
             if specific_analysis:
-                context_parts.append(f"\nSPECIFIC ANALYSIS:")
-                context_parts.append(specific_analysis)
+                context_parts += ["\nSPECIFIC ANALYSIS:", specific_analysis]
             
             # Generate visualizations when analysis is requested, or time filters provided
             visualizations = {}
-            should_chart = self._should_generate_charts(message)
-            if any(w in message.lower() for w in ["analyze", "analysis", "breakdown", "insight", "overview", "show", "plot", "chart", "graph", "visualize", "expenditure", "spending"]):
+            should_chart = self._should_generate_charts(msg, tokens)
+            if not _CHART_FORCE_KW.isdisjoint(tokens):
                 should_chart = True
             if (year is not None or month is not None):
                 # If user specified a time filter, default to generating charts relevant to spend/category
@@ -172,15 +504,25 @@ class EnhancedOrchestrator:
                 try:
                     # Build filtered inputs for visualizations
                     # recent_data filtered by year/month if provided
-                    where = ""
-                    if year and month:
-                        where = f" WHERE CAST(date AS VARCHAR) LIKE '{year}-{month:02d}%'"
-                    elif year:
-                        where = f" WHERE CAST(date AS VARCHAR) LIKE '{year}%'"
-                    recent_sql = (
-                        "SELECT date, amount FROM t" + where + " ORDER BY date ASC LIMIT 5000"
-                    )
-                    recent_data = query_csv(recent_sql, limit=5000, user_id=user_id)
+                    where, params = "", None
+                    if year:
+                        # Half-open typed range: a native date scan, no per-row string cast
+                        where, params = " WHERE date >= ? AND date < ?", list(_period_bounds(year, month))
+                    if month is None and not any(h in msg for h in _ROW_LEVEL_CHART_HINTS):
+                        # Trend over a year or more: one row per month is all the charts plot
+                        recent_sql = (
+                            "SELECT date_trunc('month', date) AS date, SUM(amount) AS amount FROM t"
+                            + where + " GROUP BY 1 ORDER BY 1"
+                        )
+                    else:
+                        recent_sql = (
+                            "SELECT date, amount FROM t" + where + " ORDER BY date ASC LIMIT 5000"
+                        )
+                    # The three reads are independent and each loads the CSV itself; run them together
+                    recent_f = _VIZ_POOL.submit(query_csv, recent_sql, limit=5000, user_id=user_id, params=params)
+                    cat_f = _VIZ_POOL.submit(category_stats, year=year, month=month, user_id=user_id)
+                    merch_f = _VIZ_POOL.submit(merchant_stats, year=year, month=month, top_n=10, user_id=user_id)
+                    recent_data = recent_f.result()
                     # attach meta label for time range
                     label_parts = []
                     if year:
@@ -191,7 +533,7 @@ class EnhancedOrchestrator:
                     recent_data = {**recent_data, "meta": {"label": time_label}}
 
                     # category-based spending data mapped to expected shape
-                    cat = category_stats(year=year, month=month, user_id=user_id)
+                    cat = cat_f.result()
                     spending_data = {
                         "totals": [
                             {"key": it.get("category", "Unknown"), "spent": it.get("spent", 0.0)}
@@ -201,7 +543,7 @@ class EnhancedOrchestrator:
                     }
 
                     # top merchants
-                    merchants_data = merchant_stats(year=year, month=month, top_n=10, user_id=user_id)
+                    merchants_data = merch_f.result()
                     merchants_data = {**merchants_data, "meta": {"label": time_label}}
 
                     # Generate dynamic visualizations based on user request
@@ -216,10 +558,12 @@ class EnhancedOrchestrator:
         except Exception as e:
             return f"Error analyzing transaction data: {str(e)}", {}
 
-    def _get_date_range(self, user_id: Optional[str] = None) -> str:
+    def _get_date_range(self, user_id: Optional[str] = None, mtime: Optional[float] = None) -> str:
         """Get the date range of the transaction data"""
         try:
-            cov = time_coverage(user_id=user_id)
+            if mtime is None:
+                mtime = _csv_mtime(user_id)
+            cov = _cached_time_coverage(user_id, mtime)
             if cov.get("min") or cov.get("max"):
                 return f"{cov.get('min', 'Unknown')} to {cov.get('max', 'Unknown')}"
             return "Unknown"
@@ -227,93 +571,40 @@ class EnhancedOrchestrator:
             print(f"Date range error: {e}")
             return "Unknown"
 
-    def _get_specific_analysis(self, message: str, user_id: Optional[str] = None) -> str:
-        """Get specific analysis based on the user's question - optimized for speed"""
+    def _get_specific_analysis(self, message_lower: str, user_id: Optional[str] = None, mtime: Optional[float] = None) -> str:
+        """Get specific analysis based on the user's (lowercased) question - optimized for speed"""
         try:
-            message_lower = message.lower()
+            intents = {m.lastgroup for m in _INTENT_RE.finditer(message_lower)}
+            # Aggregates are memoized per (user, CSV mtime); a new upload misses the cache
+            if mtime is None:
+                mtime = _csv_mtime(user_id)
             
-            # Use query_csv with user_id
-            def q(sql): return query_csv(sql, user_id=user_id)
-            if any(word in message_lower for word in ['monthly', 'month', 'this month', 'last month']):
-                monthly_data = q("""
-                    SELECT 
-                        strftime('%Y-%m', date) as month,
-                        SUM(amount) as total_spent,
-                        COUNT(*) as transaction_count
-                    FROM t 
-                    GROUP BY strftime('%Y-%m', date) 
-                    ORDER BY month DESC 
-                    LIMIT 6
-                """)
-                if monthly_data.get('rows'):
-                    analysis = "MONTHLY SPENDING:\n"
-                    for row in monthly_data['rows'][:3]:  # Show only top 3 months
-                        analysis += f"- {row.get('month', 'N/A')}: ₹{row.get('total_spent', 0):,.0f}\n"
+            if 'monthly' in intents:
+                analysis = _monthly_agg(user_id, mtime)
+                if analysis:
                     return analysis
             
             # Category analysis - simplified
-            if any(word in message_lower for word in ['category', 'categories', 'spending by', 'top spending']):
-                category_breakdown = q("""
-                    SELECT 
-                        category,
-                        SUM(monthly_expense_total) as total
-                    FROM t 
-                    WHERE category IS NOT NULL AND category != ''
-                    GROUP BY category 
-                    ORDER BY total DESC 
-                    LIMIT 5
-                """)
-                if category_breakdown.get('rows'):
-                    analysis = "TOP SPENDING CATEGORIES:\n"
-                    for row in category_breakdown['rows']:
-                        analysis += f"- {row.get('category', 'Unknown')}: ₹{row.get('total', 0):,.0f}\n"
+            if 'category' in intents:
+                analysis = _category_agg(user_id, mtime)
+                if analysis:
                     return analysis
             
             # Merchant analysis - simplified
-            if any(word in message_lower for word in ['merchant', 'merchants', 'where did', 'spent on', 'top merchants']):
-                merchant_breakdown = q("""
-                    SELECT 
-                        merchant,
-                        SUM(amount) as total
-                    FROM t 
-                    WHERE merchant IS NOT NULL AND merchant != ''
-                    GROUP BY merchant 
-                    ORDER BY total DESC 
-                    LIMIT 5
-                """)
-                if merchant_breakdown.get('rows'):
-                    analysis = "TOP MERCHANTS:\n"
-                    for row in merchant_breakdown['rows']:
-                        analysis += f"- {row.get('merchant', 'Unknown')}: ₹{row.get('total', 0):,.0f}\n"
+            if 'merchant' in intents:
+                analysis = _merchant_agg(user_id, mtime)
+                if analysis:
                     return analysis
             
             # Year/month specific analysis (generic)
-            y, m = self._extract_year_month(message)
+            y, m = self._extract_year_month(message_lower)
             if y is not None or m is not None:
-                ts = total_spend(year=y, month=m, user_id=user_id)
-                parts = [f"FILTER: year={y or 'all'} month={m or 'all'}", f"- Total spent: ₹{ts.get('total', 0.0):,.0f}"]
-                cats = category_stats(year=y, month=m, user_id=user_id)
-                if cats.get("items"):
-                    topcats = ", ".join([f"{it['category']}: ₹{it['spent']:,.0f}" for it in cats['items'][:3]])
-                    parts.append(f"- Top categories: {topcats}")
-                merch = merchant_stats(year=y, month=m, top_n=3, user_id=user_id)
-                if merch.get("items"):
-                    topm = ", ".join([f"{it['merchant']}: ₹{it['spent']:,.0f}" for it in merch['items']])
-                    parts.append(f"- Top merchants: {topm}")
-                return "\n".join(parts)
+                return _filtered_agg(user_id, y, m, mtime)
             
             # Quick summary for general questions
-            if any(word in message_lower for word in ['summary', 'overview', 'total', 'how much']):
-                summary_data = q("""
-                    SELECT 
-                        SUM(monthly_expense_total) as total_spent,
-                        COUNT(*) as transaction_count,
-                        AVG(monthly_expense_total) as avg_transaction
-                    FROM t
-                """)
-                if summary_data.get('rows'):
-                    row = summary_data['rows'][0]
-                    analysis = f"QUICK SUMMARY:\n- Total spent: ₹{row.get('total_spent', 0):,.0f}\n- Transactions: {row.get('transaction_count', 0)}\n- Avg per transaction: ₹{row.get('avg_transaction', 0):,.0f}\n"
+            if 'summary' in intents:
+                analysis = _summary_agg(user_id, mtime)
+                if analysis:
                     return analysis
             
             return ""
@@ -321,27 +612,42 @@ class EnhancedOrchestrator:
         except Exception as e:
             return f"Error in specific analysis: {str(e)}"
 
-    def craft_advisor_reply(self, user_message: str, observations_text: str = "") -> str:
+    def craft_advisor_reply(self, user_message: str, observations_text: str = "", use_cache: bool = True) -> str:
         """
         Craft a concise advisor reply with data context (integrated from advisor_reply.py)
         """
+        # Advice is only reused for the very same question (after case/space normalization)
+        partition = ("advisor", _csv_mtime(None), observations_text)
+        if use_cache:
+            cached, _ = self.response_cache.lookup(partition, user_message, exact_only=True)
+            if cached is not None:
+                return cached.answer
+        
         guidance = (
             "Write a concise advisor reply. Start with a one-line assessment. "
             "Then provide up to four bullet points of actions or numbers. "
             "If you need a file or confirmation, ask one short question at the end."
         )
         
-        # Lightweight CSV context so the model knows the available columns immediately
-        try:
-            meta = describe_csv(user_id=None) # Use base CSV for columns info if needed
-            colnames = ", ".join([c.get("name","?") for c in meta.get("columns", [])][:12])
-            sample_rows = meta.get("sample", [])[:2]
-            data_context = f"Data columns: {colnames}. Sample rows: {sample_rows}"
-        except Exception:
-            data_context = "Data columns: (unavailable)"
+        # Lightweight CSV context so the model knows the available columns immediately;
+        # it only depends on the base CSV, so rebuild it only when that file changes
+        mtime = _csv_mtime(None)
+        if _advisor_ctx_cache["mtime"] != mtime or _advisor_ctx_cache["text"] is None:
+            try:
+                meta = describe_csv(user_id=None) # Use base CSV for columns info if needed
+                colnames = ", ".join([c.get("name","?") for c in meta.get("columns", [])][:12])
+                sample_rows = meta.get("sample", [])[:2]
+                text = f"Data columns: {colnames}. Sample rows: {sample_rows}"
+            except Exception:
+                text = "Data columns: (unavailable)"
+            _advisor_ctx_cache.update(mtime=mtime, text=text)
+        data_context = _advisor_ctx_cache["text"]
         
         prompt = f"{system_advisor}\nData Context:\n{data_context}\nObservations:\n{observations_text}\nUser: {user_message}\n{guidance}\nFinal answer:"
-        return self.llm_client.complete(prompt).strip()
+        answer = self.llm_client.complete(prompt).strip()
+        if use_cache:
+            self.response_cache.store(partition, user_message, ChatResponse(answer))
+        return answer
 
     def _process_with_vectordb_workflow(
         self,
@@ -354,59 +660,42 @@ class EnhancedOrchestrator:
         User Query → Parsing Agent → Embedding → VectorDB Search → Strategy Agent → Risk Agent → Output Agent
         """
         try:
+            message_lower = message.lower()
+            
             # Step 1: Parsing Agent - Extract intent and requirements
             parsed = self.parsing_agent.parse_query(message, context)
             
-            # Step 2: Retrieve knowledge from VectorDB if needed
-            knowledge_context = []
+            # Steps 2-3 only depend on `parsed`: start knowledge retrieval, the transaction
+            # summary and the profile read together and wait on each where it's first needed
+            knowledge_f = tx_f = profile_f = None
             if parsed.get('requires_knowledge', False):
                 query_keywords = ' '.join(parsed.get('keywords', [message]))
-                knowledge_context = self.knowledge_store.retrieve_knowledge(
+                knowledge_f = _PREFETCH_POOL.submit(
+                    self.knowledge_store.retrieve_knowledge,
                     query=query_keywords,
                     namespace=None,  # Search all namespaces
                     top_k=5
                 )
+            if parsed.get('requires_transaction_data', False):
+                tx_f = _PREFETCH_POOL.submit(_gather_transaction_summary, user_id)
+                if self.analysis_agent:
+                    profile_f = _PREFETCH_POOL.submit(_load_profile)
+            
+            # Step 2: Retrieve knowledge from VectorDB if needed
+            knowledge_context = knowledge_f.result() if knowledge_f else []
             
             # Step 3: Get transaction data if needed
             transaction_summary = None
             financial_analysis = None
-            if parsed.get('requires_transaction_data', False):
+            if tx_f:
                 try:
-                    # Get basic transaction summary
-                    total = total_spend(user_id=user_id)
-                    monthly = monthly_spend(user_id=user_id)
-                    categories = category_stats(user_id=user_id)
-                    
-                    # Get category breakdown for expenses
-                    category_breakdown = {}
-                    if categories.get('items'):
-                        for item in categories.get('items', []):
-                            cat_name = item.get('category', 'Unknown')
-                            cat_spent = item.get('spent', 0)
-                            if cat_spent > 0:
-                                category_breakdown[cat_name] = cat_spent
-                    
-                    transaction_summary = {
-                        'total_spend': total.get('total', 0),
-                        'monthly_spend': monthly.get('recent_monthly', {}).get('total', 0) if monthly else 0,
-                        'top_categories': [cat.get('category') for cat in categories.get('items', [])[:5]],
-                        'category_breakdown': category_breakdown,
-                        'savings_rate': 0  # Calculate if income data available
-                    }
+                    transaction_summary = tx_f.result()
                     
                     # Perform financial health analysis if analysis agent is available
-                    if self.analysis_agent:
+                    if profile_f:
                         try:
-                            # Load user profile for income/savings goals
-                            import json
-                            profile_path = os.path.join(
-                                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                                'state', 'profile.json'
-                            )
-                            profile = {}
-                            if os.path.exists(profile_path):
-                                with open(profile_path, 'r') as f:
-                                    profile = json.load(f)
+                            # User profile for income/savings goals
+                            profile = profile_f.result()
                             
                             # Extract financial data
                             financial_data = self.analysis_agent.extract_financial_data_from_transactions(
@@ -494,7 +783,10 @@ class EnhancedOrchestrator:
                 return response
             else:
                 # For non-investment queries, use knowledge context but simpler output
-                data_analysis, visualizations = self._get_comprehensive_data_context(message, user_id=user_id)
+                data_analysis, visualizations = (
+                    self._get_comprehensive_data_context(message, user_id=user_id, message_lower=message_lower)
+                    if _is_data_query(message_lower) else ("", {})
+                )
                 
                 # Build prompt with knowledge context
                 full_prompt = f"{system_advisor}\n\n"
@@ -505,6 +797,9 @@ class EnhancedOrchestrator:
                         knowledge_text += f"\n[{i}] {chunk.get('content', '')}\n"
                     full_prompt += f"{knowledge_text}\n\n"
                 
+                if data_analysis == _NO_DATA_ALERT:
+                    return _no_data_response()
+                
                 if data_analysis:
                     full_prompt += f"TRANSACTION DATA CONTEXT:\n{data_analysis}\n\n"
                 
@@ -539,7 +834,8 @@ class EnhancedOrchestrator:
             print(f"VectorDB workflow error: {e}")
             return None
     
-    def chat(self, message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+    def chat(self, message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None,
+             use_cache: bool = True) -> ChatResponse:
         """
         Main chat function that processes user messages and returns structured responses
         Uses VectorDB workflow if available, otherwise falls back to original workflow
@@ -548,90 +844,224 @@ class EnhancedOrchestrator:
             message: User's message
             context: Conversation context
             user_id: Optional user ID for personalization
+            use_cache: Reuse a recent answer to the same (or a near-identical) question
         """
         try:
-            # Try VectorDB workflow first if available
-            if self.use_vectordb:
-                vectordb_response = self._process_with_vectordb_workflow(message, context, user_id=user_id)
-                if vectordb_response:
-                    return vectordb_response
-            
-            # Fallback to original workflow
-            # Build context from previous messages (limit to last 5 to avoid repetition)
-            context_str = ""
-            if context:
-                recent_context = context[-5:]  # Only keep last 5 messages
-                context_str = "\n".join([f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in recent_context])
-            
-            # Get comprehensive data context
-            data_analysis, visualizations = self._get_comprehensive_data_context(message, user_id=user_id)
-            
-            # Create the full prompt with rich data context
-            full_prompt = f"{system_advisor}\n\n"
-            
-            if data_analysis:
-                full_prompt += f"TRANSACTION DATA CONTEXT:\n{data_analysis}\n\n"
-            
-            full_prompt += f"User Question: {message}\n\n"
-            
-            if context_str:
-                full_prompt += f"Recent conversation:\n{context_str}\n\n"
-            
-            # Add instructions for faster, more focused responses
-            full_prompt += """INSTRUCTIONS:
+            if not use_cache:
+                return self._chat_uncached(message, context, user_id=user_id)
+            partition, cached, embedding = self._cache_lookup(message, context, user_id)
+            if cached is not None:
+                return cached
+            response_data = self._chat_uncached(message, context, user_id=user_id)
+            if response_data.status != "error":
+                self.response_cache.store(partition, message, response_data, embedding)
+            return response_data
+        except Exception as e:
+            return _error_response(e)
+    
+    def _cache_lookup(self, message: str, context: List[Dict[str, str]] = None,
+                      user_id: Optional[str] = None) -> Tuple[tuple, Optional[ChatResponse], Any]:
+        """Response-cache partition for this turn, plus the cached reply (or None) and its embedding"""
+        # Same user, same data, same recent conversation and the same numbers/months in the
+        # question -> reuse an earlier answer. Data questions must match exactly: paraphrase
+        # matching can't tell "March" from "April" apart, and the figures would be wrong.
+        message_lower = message.lower()
+        partition = (user_id, _csv_mtime(user_id), _context_key(context), _query_facets(message_lower))
+        cached, embedding = self.response_cache.lookup(
+            partition, message, exact_only=_is_data_query(message_lower))
+        return partition, cached, embedding
+    
+    async def chat_async(self, message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None,
+                         use_cache: bool = True) -> ChatResponse:
+        """
+        chat() for async callers. The pipeline (CSV queries, LLM HTTP) is blocking, so each turn runs
+        on a worker thread and concurrent turns overlap instead of queueing behind one another.
+        """
+        return await asyncio.to_thread(self.chat, message, context, user_id, use_cache)
+    
+    def prefetch(self, user_id: Optional[str] = None) -> None:
+        """Warm the CSV overview and subscription lookups the next chat turn starts with"""
+        try:
+            mtime = _csv_mtime(user_id)
+            if mtime is None:
+                return
+            _cached_describe_csv(user_id, mtime)
+            _cached_time_coverage(user_id, mtime)
+            _subscription(user_id)
+        except Exception as e:
+            print(f"Prefetch failed: {e}")
+    
+    def _build_chat_prompt(self, message: str, context: List[Dict[str, str]] = None,
+                           user_id: Optional[str] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Data-context prompt and charts for one turn; prompt is None when the user has no data"""
+        # Build context from previous messages (limit to last 5 to avoid repetition)
+        context_str = ""
+        if context:
+            recent_context = context[-5:]  # Only keep last 5 messages
+            context_str = "\n".join([f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in recent_context])
+        
+        # Get comprehensive data context
+        message_lower = message.lower()
+        data_analysis, visualizations = (
+            self._get_comprehensive_data_context(message, user_id=user_id, message_lower=message_lower)
+            if _is_data_query(message_lower) else ("", {})
+        )
+        if data_analysis == _NO_DATA_ALERT:
+            return None, {}
+        
+        # Create the full prompt with rich data context
+        full_prompt = f"{system_advisor}\n\n"
+        
+        if data_analysis:
+            full_prompt += f"TRANSACTION DATA CONTEXT:\n{data_analysis}\n\n"
+        
+        full_prompt += f"User Question: {message}\n\n"
+        
+        if context_str:
+            full_prompt += f"Recent conversation:\n{context_str}\n\n"
+        
+        # Add instructions for faster, more focused responses
+        full_prompt += """INSTRUCTIONS:
 - Provide concise, data-driven answers with specific numbers
 - Be direct and to the point - avoid lengthy explanations
 - Use bullet points for multiple items
 - If visualizations are available, mention them briefly
 - Don't repeat greetings if continuing a conversation
 - Focus on the most relevant data points"""
+        return full_prompt, visualizations
+    
+    async def chat_stream(self, message: str, context: List[Dict[str, str]] = None,
+                          user_id: Optional[str] = None, use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Yield the answer text of chat() as the LLM produces it, sharing chat()'s response cache.
+        Replies that can't be streamed as is arrive in one piece: cache hits, VectorDB workflow
+        answers and JSON replies (only their "answer" field is shown). Charts are built and cached
+        with the reply but, being images, are not part of the streamed text.
+        """
+        try:
+            partition = embedding = None
+            if use_cache:
+                partition, cached, embedding = await asyncio.to_thread(
+                    self._cache_lookup, message, context, user_id)
+                if cached is not None:
+                    yield cached.answer
+                    return
             
-            # Get response from LLM
-            response = self.llm_client.complete(full_prompt)
+            response = None
+            if self.use_vectordb:
+                vectordb_response = await asyncio.to_thread(
+                    self._process_with_vectordb_workflow, message, context, user_id)
+                if vectordb_response:
+                    response = ChatResponse.from_dict(vectordb_response)
             
-            # Prepare response with visualizations
-            response_data = {
-                "answer": response,
-                "status": "success",
-                "type": "text"
-            }
+            if response is None:
+                full_prompt, visualizations = await asyncio.to_thread(
+                    self._build_chat_prompt, message, context, user_id)
+                if full_prompt is None:
+                    response = _no_data_response()
             
-            # Add visualizations if available
-            if visualizations:
-                response_data["visualizations"] = visualizations
-                response_data["type"] = "visualization"
+            # Held back (sent in one piece at the end) unless the LLM reply streams as plain text
+            held = True
+            if response is None:
+                parts: List[str] = []
+                pieces = self.llm_client.stream(full_prompt)
+                try:
+                    while True:
+                        piece = await asyncio.to_thread(next, pieces, None)
+                        if piece is None:
+                            break
+                        parts.append(piece)
+                        if held:
+                            # The first visible character shows whether the reply is JSON
+                            text = "".join(parts)
+                            if not text.strip() or _looks_like_json(text):
+                                continue
+                            held = False
+                            piece = text
+                        yield piece
+                finally:
+                    # Releases the HTTP response when the caller stops reading early
+                    pieces.close()
+                response = _finish_reply("".join(parts), visualizations)
             
-            # Try to parse as JSON first, fallback to text
-            try:
-                # Try to extract JSON from response
-                json_response = validate_json_response(response)
-                response_data["answer"] = json_response.get("answer", response)
-                response_data["type"] = "json"
-                response_data["data"] = json_response
-            except:
-                # Keep the text response as is
-                pass
+            if use_cache and response.status != "error":
+                self.response_cache.store(partition, message, response, embedding)
+            if held:
+                yield response.answer
+        except Exception as e:
+            yield _error_response(e).answer
+    
+    def _chat_uncached(self, message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None) -> ChatResponse:
+        """Run the full chat pipeline (VectorDB workflow or data-context prompt + LLM)"""
+        try:
+            # Try VectorDB workflow first if available
+            if self.use_vectordb:
+                vectordb_response = self._process_with_vectordb_workflow(message, context, user_id=user_id)
+                if vectordb_response:
+                    return ChatResponse.from_dict(vectordb_response)
             
-            return response_data
+            # Fallback to original workflow
+            full_prompt, visualizations = self._build_chat_prompt(message, context, user_id=user_id)
+            if full_prompt is None:
+                # The reply is fixed; skip the LLM round trip
+                return _no_data_response()
+            
+            # Get response from LLM
+            return _finish_reply(self.llm_client.complete(full_prompt), visualizations)
                 
         except Exception as e:
-            return {
-                "answer": f"I apologize, but I encountered an error: {str(e)}",
-                "status": "error",
-                "type": "error"
-            }
+            return _error_response(e)
+
+# Shared instance, built on first use so importing this module stays cheap
+_instance: Optional[EnhancedOrchestrator] = None
+_instance_lock = threading.Lock()
 
-# Create global instance
-enhanced_orchestrator = EnhancedOrchestrator()
+def get_orchestrator() -> EnhancedOrchestrator:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = EnhancedOrchestrator()
+    return _instance
+
+def __getattr__(name):
+    # Keep `from orchestrator import enhanced_orchestrator` working without eager construction
+    if name == "enhanced_orchestrator":
+        return get_orchestrator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def chat(message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None,
+         use_cache: bool = True) -> ChatResponse:
+    """
+    Main chat function that can be imported by other modules; call .to_dict() for the JSON body
+    """
+    return get_orchestrator().chat(message, context, user_id=user_id, use_cache=use_cache)
+
+async def chat_async(message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None,
+                     use_cache: bool = True) -> ChatResponse:
+    """
+    Awaitable variant of chat(); many calls can be gathered concurrently
+    """
+    return await get_orchestrator().chat_async(message, context, user_id=user_id, use_cache=use_cache)
+
+async def chat_stream(message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None,
+                      use_cache: bool = True) -> AsyncIterator[str]:
+    """
+    Streaming variant of chat(): yields pieces of the same answer text as they arrive
+    """
+    async with aclosing(get_orchestrator().chat_stream(message, context, user_id=user_id,
+                                                       use_cache=use_cache)) as pieces:
+        async for piece in pieces:
+            yield piece
 
-def chat(message: str, context: List[Dict[str, str]] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+async def prefetch_async(user_id: Optional[str] = None) -> None:
     """
-    Main chat function that can be imported by other modules
+    Warm per-user caches in the background, e.g. while the user is typing
     """
-    return enhanced_orchestrator.chat(message, context, user_id=user_id)
+    await asyncio.to_thread(get_orchestrator().prefetch, user_id)
 
-def craft_answer(user_message: str, observations_text: str = "") -> str:
+def craft_answer(user_message: str, observations_text: str = "", use_cache: bool = True) -> str:
     """
     Convenience function for backward compatibility with advisor_reply.py
     """
-    return enhanced_orchestrator.craft_advisor_reply(user_message, observations_text)
+    return get_orchestrator().craft_advisor_reply(user_message, observations_text, use_cache=use_cache)
@@ -1,20 +1,61 @@
 # run_cli.py
+import asyncio
 import os
-from orchestrator import chat
+import sys
+from contextlib import aclosing
+from orchestrator import chat_stream, prefetch_async
 
-def main():
+try:
+	from prompt_toolkit import PromptSession  # optional: non-blocking prompt
+except ImportError:
+	PromptSession = None
+
+MAX_ANSWER_CHARS = 4000
+
+
+async def _read(session, prompt):
+	if session is not None:
+		return await session.prompt_async(prompt)
+	# Plain input() blocks the loop, but prefetch runs on a worker thread and keeps going
+	return input(prompt)
+
+
+async def _main():
 	print("Cashflow Advisor (CLI). Type 'exit' to quit.\n")
+	session = PromptSession() if PromptSession else None
+	# Warm the data caches while the user types; refreshed after every answer
+	warm = asyncio.create_task(prefetch_async())
 	while True:
 		try:
-			msg = input("You: ").strip()
+			msg = (await _read(session, "You: ")).strip()
 			if not msg:
 				continue
 			if msg.lower() in ("exit","quit"): break
-			res = chat(msg, [])
-			print("Cashflow:", (res.get("answer") or str(res))[:4000])
+			# Print the answer as it streams in; stop reading (and close the LLM stream) at the cap
+			sys.stdout.write("Cashflow: ")
+			shown = 0
+			async with aclosing(chat_stream(msg, [])) as pieces:
+				async for piece in pieces:
+					piece = piece[:MAX_ANSWER_CHARS - shown]
+					sys.stdout.write(piece)
+					sys.stdout.flush()
+					shown += len(piece)
+					if shown >= MAX_ANSWER_CHARS:
+						break
+			print()
+			warm = asyncio.create_task(prefetch_async())
 		except (KeyboardInterrupt, EOFError):
 			print("\nBye!")
 			break
+	await warm
+
+
+def main():
+	try:
+		asyncio.run(_main())
+	except KeyboardInterrupt:
+		# Ctrl-C can surface here once asyncio has cancelled the main task
+		print("\nBye!")
 
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,154 @@
+"""
+Two-tier response cache for chat: an exact match on the normalized message first, then
+cosine similarity against embeddings of recently answered messages. Entries live in one
+LRU with a TTL and are partitioned (user, data version, conversation) so answers never
+cross users or outlive an upload.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "all-MiniLM-L6-v2")
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form used for the exact-match tier"""
+    return _SPACE_RE.sub(" ", (message or "").strip().lower())
+
+
+@lru_cache(maxsize=1)
+def _model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SEMANTIC_CACHE_MODEL, device="cpu")
+
+
+def default_embedder() -> Optional[Callable[[str], np.ndarray]]:
+    """Normalized sentence-transformer embedding, or None when the package isn't installed"""
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return None
+    return lambda text: _model().encode(text, normalize_embeddings=True, convert_to_numpy=True)
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = 0.92,
+        maxsize: int = 512,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Optional byte budget: weigh(response) estimates each entry's size
+        self.max_bytes = max_bytes
+        self.weigh = weigh
+        self._sizes: Dict[Tuple[Hashable, str], int] = {}
+        self._bytes = 0
+        # (partition, normalized message) -> (unit embedding or None, response, expiry or None)
+        self._entries: "OrderedDict[Tuple[Hashable, str], Tuple[Optional[np.ndarray], Any, Optional[float]]]" = OrderedDict()
+        # partition -> (entry keys, contiguous float32 matrix of their embeddings); rebuilt only
+        # after that partition changes, so repeat lookups are a single matrix-vector product
+        self._matrices: Dict[Hashable, Tuple[list, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None:
+            return None
+        try:
+            vec = np.asarray(self.embed_fn(text), dtype=np.float32).ravel()
+        except Exception as e:
+            print(f"Semantic cache disabled, embedding failed: {e}")
+            self.embed_fn = None
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def lookup(self, partition: Hashable, message: str,
+               exact_only: bool = False) -> Tuple[Optional[Any], Optional[np.ndarray]]:
+        """
+        Return (cached response or None, query embedding). Pass the embedding back to
+        store() on a miss so the message isn't embedded twice. With exact_only, only the
+        normalized-message tier is consulted and nothing is embedded.
+        """
+        key = (partition, normalize_message(message))
+        with self._lock:
+            hit = self._live(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                return hit[1], hit[0]
+        if exact_only:
+            return None, None
+
+        query = self._embed(key[1])
+        if query is None:
+            return None, None
+        with self._lock:
+            keys, matrix = self._partition_matrix(partition, query.shape[0])
+            if not keys:
+                return None, query
+            sims = matrix @ query
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                return None, query
+            best_key = keys[best]
+            if self._live(best_key) is None:
+                return None, query
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1], query
+
+    def _live(self, key: Tuple[Hashable, str]):
+        """The entry under key, dropping it if it has expired; caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key: Tuple[Hashable, str]):
+        """Remove one entry and its bookkeeping; caller holds the lock"""
+        del self._entries[key]
+        self._bytes -= self._sizes.pop(key, 0)
+        self._matrices.pop(key[0], None)
+
+    def _partition_matrix(self, partition: Hashable, dim: int) -> Tuple[list, np.ndarray]:
+        """Embeddings of one partition stacked row-wise; caller holds the lock"""
+        cached = self._matrices.get(partition)
+        if cached is None:
+            keys = [k for k, (vec, _, _) in self._entries.items()
+                    if k[0] == partition and vec is not None and vec.shape == (dim,)]
+            matrix = (np.ascontiguousarray(np.stack([self._entries[k][0] for k in keys]), dtype=np.float32)
+                      if keys else np.empty((0, dim), dtype=np.float32))
+            cached = self._matrices[partition] = (keys, matrix)
+        return cached
+
+    def store(self, partition: Hashable, message: str, response: Any,
+              embedding: Optional[np.ndarray] = None):
+        key = (partition, normalize_message(message))
+        size = self.weigh(response) if self.weigh else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            expires = time.monotonic() + self.ttl if self.ttl else None
+            self._entries[key] = (embedding, response, expires)
+            self._sizes[key] = size
+            self._bytes += size
+            self._matrices.pop(partition, None)
+            while len(self._entries) > self.maxsize or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
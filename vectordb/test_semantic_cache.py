@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat response cache and ChatResponse.
+Run from the project root: python -m pytest vectordb/test_semantic_cache.py
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from vectordb import semantic_cache
+from vectordb.semantic_cache import SemanticCache
+from vectordb.orchestrator import ChatResponse, EnhancedOrchestrator, _query_facets
+
+# Hand-picked unit vectors: the two spending questions are near-identical (cosine ~0.99),
+# the weather one is orthogonal to both
+_VECTORS = {
+    "how much did i spend": np.array([1.0, 0.0, 0.0]),
+    "how much have i spent": np.array([0.99, 0.14, 0.0]),
+    "what is the weather": np.array([0.0, 0.0, 1.0]),
+}
+
+
+def _embed(text):
+    return _VECTORS[text]
+
+
+class SemanticCacheTests(unittest.TestCase):
+    def test_exact_hit_ignores_case_and_spacing(self):
+        cache = SemanticCache(embed_fn=None)
+        cache.store("p", "How much  did I spend", "answer")
+        self.assertEqual(cache.lookup("p", " how much did i SPEND ")[0], "answer")
+
+    def test_paraphrase_hit_above_threshold(self):
+        cache = SemanticCache(embed_fn=_embed, threshold=0.9)
+        _, emb = cache.lookup("p", "how much did i spend")
+        cache.store("p", "how much did i spend", "answer", emb)
+        self.assertEqual(cache.lookup("p", "how much have i spent")[0], "answer")
+
+    def test_no_hit_below_threshold(self):
+        cache = SemanticCache(embed_fn=_embed, threshold=0.9)
+        _, emb = cache.lookup("p", "how much did i spend")
+        cache.store("p", "how much did i spend", "answer", emb)
+        self.assertIsNone(cache.lookup("p", "what is the weather")[0])
+
+    def test_exact_only_skips_paraphrase_tier(self):
+        cache = SemanticCache(embed_fn=_embed, threshold=0.9)
+        _, emb = cache.lookup("p", "how much did i spend")
+        cache.store("p", "how much did i spend", "answer", emb)
+        self.assertEqual(cache.lookup("p", "how much have i spent", exact_only=True), (None, None))
+        self.assertEqual(cache.lookup("p", "how much did i spend", exact_only=True)[0], "answer")
+
+    def test_partitions_are_isolated(self):
+        cache = SemanticCache(embed_fn=_embed, threshold=0.9)
+        _, emb = cache.lookup("alice", "how much did i spend")
+        cache.store("alice", "how much did i spend", "alice's answer", emb)
+        self.assertIsNone(cache.lookup("bob", "how much did i spend")[0])
+        self.assertIsNone(cache.lookup("bob", "how much have i spent")[0])
+
+    def test_lru_eviction(self):
+        cache = SemanticCache(embed_fn=None, maxsize=2)
+        cache.store("p", "a", 1)
+        cache.store("p", "b", 2)
+        cache.lookup("p", "a")  # a is now most recently used
+        cache.store("p", "c", 3)
+        self.assertEqual(cache.lookup("p", "a")[0], 1)
+        self.assertIsNone(cache.lookup("p", "b")[0])
+        self.assertEqual(cache.lookup("p", "c")[0], 3)
+
+    def test_evicted_entry_leaves_paraphrase_matrix(self):
+        cache = SemanticCache(embed_fn=_embed, threshold=0.9, maxsize=1)
+        _, emb = cache.lookup("p", "how much did i spend")
+        cache.store("p", "how much did i spend", "answer", emb)
+        cache.store("q", "what is the weather", "sunny", _embed("what is the weather"))
+        self.assertIsNone(cache.lookup("p", "how much have i spent")[0])
+
+    def test_byte_budget_evicts_oldest(self):
+        cache = SemanticCache(embed_fn=None, max_bytes=10, weigh=len)
+        cache.store("p", "a", "xxxx")
+        cache.store("p", "b", "yyyy")
+        cache.store("p", "c", "zzzz")
+        self.assertIsNone(cache.lookup("p", "a")[0])
+        self.assertEqual(cache.lookup("p", "b")[0], "yyyy")
+        self.assertEqual(cache.lookup("p", "c")[0], "zzzz")
+
+    def test_oversized_response_not_stored(self):
+        cache = SemanticCache(embed_fn=None, max_bytes=3, weigh=len)
+        cache.store("p", "a", "xxxx")
+        self.assertIsNone(cache.lookup("p", "a")[0])
+
+    def test_restore_replaces_size(self):
+        cache = SemanticCache(embed_fn=None, max_bytes=8, weigh=len)
+        cache.store("p", "a", "xxxx")
+        cache.store("p", "a", "xxxx")
+        cache.store("p", "b", "yyyy")
+        self.assertEqual(cache.lookup("p", "a")[0], "xxxx")
+
+    def test_ttl_expiry(self):
+        now = [1000.0]
+        with mock.patch.object(semantic_cache.time, "monotonic", lambda: now[0]):
+            cache = SemanticCache(embed_fn=_embed, threshold=0.9, ttl=60)
+            _, emb = cache.lookup("p", "how much did i spend")
+            cache.store("p", "how much did i spend", "answer", emb)
+            now[0] += 59
+            self.assertEqual(cache.lookup("p", "how much did i spend")[0], "answer")
+            now[0] += 2
+            self.assertIsNone(cache.lookup("p", "how much did i spend")[0])
+            self.assertIsNone(cache.lookup("p", "how much have i spent")[0])
+
+
+class QueryFacetTests(unittest.TestCase):
+    def test_months_and_numbers_differ(self):
+        march = _query_facets("how much did i spend in march 2023")
+        april = _query_facets("how much did i spend in april 2023")
+        self.assertNotEqual(march, april)
+        self.assertNotEqual(_query_facets("spent in 2023"), _query_facets("spent in 2024"))
+        self.assertEqual(_query_facets("hello there"), _query_facets("hi"))
+
+
+class ChatResponseTests(unittest.TestCase):
+    def test_round_trip_keeps_extra_keys(self):
+        d = {"answer": "a", "status": "success", "type": "visualization",
+             "visualizations": {"pie": "data:"}, "knowledge_sources": [1]}
+        self.assertEqual(ChatResponse.from_dict(d).to_dict(), d)
+
+    def test_defaults_and_optional_fields(self):
+        self.assertEqual(ChatResponse("hi").to_dict(), {"answer": "hi", "status": "success", "type": "text"})
+        with_data = ChatResponse("a", type="json", data={"answer": "a"}).to_dict()
+        self.assertEqual(with_data["data"], {"answer": "a"})
+
+    def test_approx_size_counts_charts(self):
+        self.assertEqual(ChatResponse("ab", visualizations={"pie": "x" * 10}).approx_size(), 12)
+
+    def test_frozen(self):
+        with self.assertRaises(Exception):
+            ChatResponse("hi").answer = "other"
+
+
+class _FakeLLM:
+    def __init__(self, reply):
+        self.reply, self.calls = reply, 0
+
+    def complete(self, prompt):
+        self.calls += 1
+        return self.reply
+
+    def stream(self, prompt):
+        self.calls += 1
+        for i in range(0, len(self.reply), 3):
+            yield self.reply[i:i + 3]
+
+
+def _orchestrator(reply):
+    orch = EnhancedOrchestrator.__new__(EnhancedOrchestrator)
+    orch.llm_client, orch.use_vectordb = _FakeLLM(reply), False
+    orch.response_cache = SemanticCache(embed_fn=None)
+    orch._build_chat_prompt = lambda message, context=None, user_id=None: ("prompt", {})
+    return orch
+
+
+async def _collect(orch, message):
+    return [piece async for piece in orch.chat_stream(message)]
+
+
+class ChatStreamTests(unittest.TestCase):
+    def test_streams_the_same_answer_as_chat(self):
+        reply = "You spent 1,200 on food."
+        pieces = asyncio.run(_collect(_orchestrator(reply), "hello"))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), _orchestrator(reply).chat("hello").answer)
+
+    def test_json_reply_yields_its_answer_field(self):
+        reply = '{"answer": "Food is your top category"}'
+        pieces = asyncio.run(_collect(_orchestrator(reply), "hello"))
+        self.assertEqual(pieces, [_orchestrator(reply).chat("hello").answer])
+        self.assertEqual(pieces, ["Food is your top category"])
+
+    def test_shares_the_response_cache_with_chat(self):
+        orch = _orchestrator("Hi there")
+        orch.chat("hello")
+        self.assertEqual(asyncio.run(_collect(orch, "hello")), ["Hi there"])
+        self.assertEqual(orch.llm_client.calls, 1)
+        asyncio.run(_collect(orch, "thanks"))
+        self.assertEqual(orch.chat("thanks").answer, "Hi there")
+        self.assertEqual(orch.llm_client.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,33 +1,59 @@
 #!/usr/bin/env python3
 """
-Test script to verify visualization functionality
+Test script to verify visualization functionality.
+Run from the project root: python -m vectordb.test_visualizations
 """
-import sys
-import os
-sys.path.append(os.path.dirname(__file__))
-
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from app.tools.csv_tools import query_csv, spend_aggregate, top_merchants, describe_csv
-from app.tools.visualization import generate_visualizations
+from app.tools.visualization import generate_visualizations, has_chart_data
+
+# Each reads the CSV; cached so test_data_access and test_visualizations share one read
+@cache
+def _cached_describe():
+    return describe_csv()
+
+@cache
+def _cached_recent():
+    return query_csv("SELECT * FROM t ORDER BY date DESC LIMIT 5")
+
+@cache
+def _cached_spending():
+    return spend_aggregate()
+
+@cache
+def _cached_merchants():
+    return top_merchants(n=5)
 
 def test_data_access():
     """Test if we can access the CSV data"""
     try:
         print("Testing CSV data access...")
         
+        # The four reads are independent; run them together and report in order
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            futs = {name: ex.submit(fn) for name, fn in [
+                ("info", _cached_describe),
+                ("recent", _cached_recent),
+                ("spending", _cached_spending),
+                ("merchants", _cached_merchants),
+            ]}
+            results = {name: f.result() for name, f in futs.items()}
+        
         # Test basic CSV info
-        csv_info = describe_csv()
+        csv_info = results["info"]
         print(f"✓ CSV Info: {csv_info}")
         
         # Test recent data
-        recent_data = query_csv("SELECT * FROM t ORDER BY date DESC LIMIT 5")
+        recent_data = results["recent"]
         print(f"✓ Recent data: {len(recent_data.get('rows', []))} records")
         
         # Test spending data
-        spending_data = spend_aggregate()
+        spending_data = results["spending"]
         print(f"✓ Spending data: {spending_data}")
         
         # Test merchant data
-        merchant_data = top_merchants(n=5)
+        merchant_data = results["merchants"]
         print(f"✓ Merchant data: {merchant_data}")
         
         return True, recent_data, spending_data, merchant_data
@@ -47,6 +73,10 @@ def test_visualizations():
             print("✗ Cannot test visualizations without data access")
             return False
         
+        if not has_chart_data(spending_data, recent_data, merchant_data):
+            print("✗ Data access returned no data to visualize")
+            return False
+        
         # Generate visualizations
         visualizations = generate_visualizations(spending_data, recent_data, merchant_data)
         